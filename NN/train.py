@@ -1,7 +1,6 @@
-import mysql.connector
+import os
+import sys
 import pandas as pd
-from datetime import datetime
-from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 import torch
@@ -9,66 +8,33 @@ import torch.nn as nn
 from torch.utils.data import Dataset, DataLoader
 
 # --- 0. DB CONFIG ---
-db_config = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'root',
-    'database': 'trades_db'
-}
-
-# --- 1. LOAD RAW TRADES ---
-cnx = mysql.connector.connect(**db_config)
+# shared DB pool lives with the API in src/app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "app"))
+from db import get_db_connection, invalidate_api_cache
+
+# --- 1. LOAD POLITICIAN FEATURES ---
+# politician_stats is kept current by triggers on politician_trades
+# (SQLIterations/iteration9.sql); the view derives the features from its sums.
+cnx = get_db_connection()
 cur = cnx.cursor(dictionary=True)
 cur.execute("""
   SELECT
-    id, politician,
-    min_roi, avg_roi, max_roi,
-    published_date, trade_date
-  FROM politician_trades
+    politician, avg_roi, std_roi, profit_rate,
+    trade_count, avg_hold, roi_missing_rate
+  FROM politician_features
+  ORDER BY politician
 """)
 rows = cur.fetchall()
 cur.close()
 cnx.close()
-df = pd.DataFrame(rows)
-
-# --- 2. PREPROCESS PER-TRADE FIELDS ---
-def parse_dt(s):
-    s2 = (s or "").replace("Sept","Sep")
-    try:
-        return datetime.strptime(s2, "%d %b %Y")
-    except:
-        return pd.NaT
-
-df['trade_dt'] = df['trade_date'].apply(parse_dt)
-df['pub_dt']   = df['published_date'].apply(parse_dt)
-df['holding_period_days'] = (
-    (df['pub_dt'] - df['trade_dt']).dt.days
-    .fillna(0).astype(int)
-)
-for c in ('min_roi','avg_roi','max_roi'):
-    df[c] = pd.to_numeric(df[c], errors='coerce')
-df['roi_missing'] = df['avg_roi'].isna().astype(int)
-
-# Impute missing ROIs as zero
-imp = SimpleImputer(strategy='constant', fill_value=0)
-df[['min_roi','avg_roi','max_roi']] = imp.fit_transform(
-    df[['min_roi','avg_roi','max_roi']]
-)
+agg = pd.DataFrame(rows)
 
-# --- 3. AGGREGATE TO POLITICIAN LEVEL ---
-agg = df.groupby('politician').agg(
-    avg_roi        = ('avg_roi',      'mean'),
-    std_roi        = ('avg_roi',      'std'),
-    profit_rate    = ('avg_roi', lambda x: (x>0).mean()),
-    trade_count    = ('id',           'count'),
-    avg_hold       = ('holding_period_days','mean'),
-    roi_missing_rate = ('roi_missing','mean')
-).reset_index()
-agg['std_roi'] = agg['std_roi'].fillna(0)
+features = ['avg_roi','std_roi','profit_rate','trade_count','avg_hold','roi_missing_rate']
+for c in features:
+    agg[c] = pd.to_numeric(agg[c], errors='coerce').astype(float)
 agg['label']   = (agg['avg_roi'] > 0).astype(int)
 
-# --- 4. PREPARE FOR TRAINING ---
-features = ['avg_roi','std_roi','profit_rate','trade_count','avg_hold','roi_missing_rate']
+# --- 2. PREPARE FOR TRAINING ---
 X = agg[features].values
 y = agg['label'].values
 pols = agg['politician'].values
@@ -92,7 +58,7 @@ class PoliDataset(Dataset):
 train_dl = DataLoader(PoliDataset(X_train, y_train), batch_size=16, shuffle=True)
 val_dl   = DataLoader(PoliDataset(X_val,   y_val),   batch_size=16)
 
-# --- 5. MODEL ---
+# --- 3. MODEL ---
 class MLP(nn.Module):
     def __init__(self, in_f):
         super().__init__()
@@ -106,7 +72,7 @@ class MLP(nn.Module):
 
 model = MLP(len(features))
 
-# --- 6. TRAIN LOOP ---
+# --- 4. TRAIN LOOP ---
 crit = nn.BCELoss()
 opt  = torch.optim.Adam(model.parameters(), lr=1e-3)
 
@@ -128,13 +94,13 @@ for epoch in range(1, 41):
         val_loss = crit(vp, torch.tensor(y_val, dtype=torch.float32).unsqueeze(1))
     print(f"Epoch {epoch:2d}  train={train_loss:.4f}  val={val_loss:.4f}")
 
-# --- 7. WRITE BACK PER-POLITICIAN ---
+# --- 5. WRITE BACK PER-POLITICIAN ---
 model.eval()
 with torch.no_grad():
     scores = model(torch.tensor(scaler.transform(agg[features].values), dtype=torch.float32))\
              .squeeze().numpy()
 
-cnx = mysql.connector.connect(**db_config)
+cnx = get_db_connection()
 cur = cnx.cursor()
 upsert = """
   INSERT INTO politician_confidence (politician,confidence_score)
@@ -147,5 +113,6 @@ for pol, sc in zip(pols, scores):
 cnx.commit()
 cur.close()
 cnx.close()
+invalidate_api_cache("confidence", "politicians")
 
 print("✅ Done: per-politician confidence scores written.")
@@ -0,0 +1,13 @@
+-- Per-politician high-water marks for update scraping (menu option 2).
+-- One row per politician page: the trade_hash (iteration11.sql) and published
+-- date of the newest trade stored from it, so the next update stops as soon as
+-- it reaches that trade or anything published before it.
+
+CREATE TABLE IF NOT EXISTS scrape_watermarks (
+  url VARCHAR(255) NOT NULL,
+  politician VARCHAR(255),
+  trade_hash BINARY(16) NOT NULL,
+  published_dt DATE,
+  updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (url)
+);
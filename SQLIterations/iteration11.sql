@@ -0,0 +1,17 @@
+-- Natural key for politician_trades: an MD5 of the fields that identify a
+-- disclosed trade, computed by MySQL so every writer agrees on it (the
+-- scraper's trade_hash() mirrors this expression). Dates are hashed from the
+-- typed trade_dt/published_dt columns, so "10 Sept 2024" and "10 Sep 2024"
+-- give the same key; the text is only used when a date couldn't be parsed.
+-- After running this, choose 7: Dedup Trades in the scraper, then apply
+-- iteration12.sql to make the key unique.
+
+ALTER TABLE politician_trades
+  ADD COLUMN trade_hash BINARY(16) AS (UNHEX(MD5(CONCAT_WS(0x1f,
+    COALESCE(politician, ''), COALESCE(ticker, ''),
+    COALESCE(trade_dt, trade_date, ''), COALESCE(published_dt, published_date, ''),
+    COALESCE(trade_type, ''),
+    COALESCE(min_purchase_price, ''), COALESCE(max_purchase_price, '')
+  )))) STORED;
+
+CREATE INDEX idx_trade_hash ON politician_trades (trade_hash);
@@ -0,0 +1,6 @@
+-- Make the trade natural key unique so re-scraped trades upsert instead of
+-- duplicating. Fails if duplicates remain: run 7: Dedup Trades first.
+
+ALTER TABLE politician_trades
+  ADD UNIQUE KEY uq_trade_hash (trade_hash),
+  DROP INDEX idx_trade_hash;
@@ -0,0 +1,50 @@
+-- Tickers whose ROI is out of date, so the scraper's "ROI Dirty" mode can
+-- recompute just those instead of the whole table. Triggers mark a ticker
+-- when one of its trades is inserted, deleted, or has its ticker, type or
+-- dates changed; the historical sync marks tickers that received new bars.
+-- ROI writes (avg/min/max_roi) never mark anything.
+
+CREATE TABLE IF NOT EXISTS roi_dirty_tickers (
+  ticker VARCHAR(100) NOT NULL,
+  marked_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+  PRIMARY KEY (ticker)
+);
+
+DROP PROCEDURE IF EXISTS mark_roi_dirty;
+DROP TRIGGER IF EXISTS trg_trades_dirty_insert;
+DROP TRIGGER IF EXISTS trg_trades_dirty_update;
+DROP TRIGGER IF EXISTS trg_trades_dirty_delete;
+
+DELIMITER $$
+
+CREATE PROCEDURE mark_roi_dirty(IN p_ticker VARCHAR(100))
+BEGIN
+  IF p_ticker IS NOT NULL AND p_ticker <> 'N/A' THEN
+    INSERT INTO roi_dirty_tickers (ticker) VALUES (p_ticker)
+    ON DUPLICATE KEY UPDATE marked_at = CURRENT_TIMESTAMP(6);
+  END IF;
+END$$
+
+CREATE TRIGGER trg_trades_dirty_insert AFTER INSERT ON politician_trades
+FOR EACH ROW
+BEGIN
+  CALL mark_roi_dirty(NEW.ticker);
+END$$
+
+CREATE TRIGGER trg_trades_dirty_update AFTER UPDATE ON politician_trades
+FOR EACH ROW
+BEGIN
+  IF NOT (OLD.ticker <=> NEW.ticker AND OLD.trade_type <=> NEW.trade_type
+          AND OLD.trade_dt <=> NEW.trade_dt AND OLD.published_dt <=> NEW.published_dt) THEN
+    CALL mark_roi_dirty(OLD.ticker);
+    CALL mark_roi_dirty(NEW.ticker);
+  END IF;
+END$$
+
+CREATE TRIGGER trg_trades_dirty_delete AFTER DELETE ON politician_trades
+FOR EACH ROW
+BEGIN
+  CALL mark_roi_dirty(OLD.ticker);
+END$$
+
+DELIMITER ;
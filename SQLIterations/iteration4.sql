@@ -11,13 +11,13 @@ CREATE TABLE historical_trades (
   vwap decimal(10,4) DEFAULT NULL,
   PRIMARY KEY (id),
   KEY idx_symbol_timestamp (symbol,timestamp)
-) 
+);
 
 CREATE TABLE politician_confidence (
   politician varchar(255) NOT NULL,
   confidence_score float DEFAULT NULL,
   PRIMARY KEY (politician)
-) 
+);
 
  CREATE TABLE politician_trades (
   id int NOT NULL AUTO_INCREMENT,
@@ -40,7 +40,7 @@ CREATE TABLE politician_confidence (
   image varchar(255) DEFAULT NULL,
   confidence_score float DEFAULT NULL,
   PRIMARY KEY (id)
-) 
+);
 
 CREATE TABLE users (
     id INT NOT NULL AUTO_INCREMENT,
@@ -48,4 +48,4 @@ CREATE TABLE users (
     email VARCHAR(255) UNIQUE,
     password VARCHAR(255),
     PRIMARY KEY (id)
-)
\ No newline at end of file
+);
\ No newline at end of file
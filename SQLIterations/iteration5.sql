@@ -0,0 +1,13 @@
+-- Make historical_trades idempotent on (symbol, timestamp) so repeated
+-- syncs upsert instead of appending duplicate bars.
+
+-- Drop duplicate bars, keeping the earliest inserted row for each key.
+DELETE h FROM historical_trades AS h
+JOIN historical_trades AS d
+  ON d.symbol = h.symbol
+ AND d.timestamp = h.timestamp
+ AND d.id < h.id;
+
+ALTER TABLE historical_trades
+  DROP INDEX idx_symbol_timestamp,
+  ADD UNIQUE KEY uq_symbol_timestamp (symbol, timestamp);
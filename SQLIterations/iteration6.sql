@@ -0,0 +1,12 @@
+-- Typed DATE columns for politician_trades so date filters and sorts can
+-- use indexes instead of STR_TO_DATE over varchar columns.
+
+ALTER TABLE politician_trades
+  ADD COLUMN published_dt DATE DEFAULT NULL AFTER published_date,
+  ADD COLUMN trade_dt DATE DEFAULT NULL AFTER trade_date;
+
+CREATE INDEX idx_ticker_trade_dt ON politician_trades (ticker, trade_dt);
+CREATE INDEX idx_politician_trade_dt ON politician_trades (politician, trade_dt);
+
+-- Existing rows are backfilled in batches by the scraper:
+-- run datascraper.py and choose "6: Backfill Dates".
@@ -0,0 +1,3 @@
+-- Lets unfiltered /Trades pages walk trade_dt order without a filesort.
+-- (InnoDB secondary indexes carry the primary key, so this covers (trade_dt, id).)
+CREATE INDEX idx_trade_dt ON politician_trades (trade_dt);
@@ -0,0 +1,32 @@
+-- Politicians dimension: one row per politician, upserted by the scraper,
+-- so /Politicians no longer de-duplicates the whole trades table.
+
+CREATE TABLE IF NOT EXISTS politicians (
+  id INT NOT NULL AUTO_INCREMENT,
+  name VARCHAR(255) NOT NULL,
+  party VARCHAR(50),
+  chamber VARCHAR(50),
+  state VARCHAR(50),
+  image VARCHAR(255),
+  PRIMARY KEY (id),
+  UNIQUE KEY uq_politician_name (name)
+);
+
+INSERT INTO politicians (name, party, chamber, state, image)
+SELECT politician, MAX(party), MAX(chamber), MAX(state), MAX(image)
+FROM politician_trades
+WHERE politician IS NOT NULL
+GROUP BY politician
+ON DUPLICATE KEY UPDATE
+  party = VALUES(party), chamber = VALUES(chamber),
+  state = VALUES(state), image = VALUES(image);
+
+ALTER TABLE politician_trades
+  ADD COLUMN politician_id INT DEFAULT NULL AFTER politician;
+
+UPDATE politician_trades AS t
+JOIN politicians AS p ON p.name = t.politician
+SET t.politician_id = p.id;
+
+ALTER TABLE politician_trades
+  ADD CONSTRAINT fk_trades_politician FOREIGN KEY (politician_id) REFERENCES politicians (id);
@@ -0,0 +1,112 @@
+-- Per-politician running aggregates behind the NN features and /PoliticianStats.
+-- Triggers on politician_trades keep them current as the scraper inserts
+-- trades and the ROI jobs rewrite avg_roi, so nothing rescans the trade history.
+-- Missing ROIs count as 0 and missing dates as a 0-day hold, as in NN/train.py.
+-- Rows are keyed by politician_id (iteration8.sql); the name comes from
+-- politicians for display. Trades without a politician_id are not counted.
+
+DROP TRIGGER IF EXISTS trg_trades_stats_insert;
+DROP TRIGGER IF EXISTS trg_trades_stats_update;
+DROP TRIGGER IF EXISTS trg_trades_stats_delete;
+DROP PROCEDURE IF EXISTS apply_trade_stats;
+
+CREATE TABLE IF NOT EXISTS politician_stats (
+  politician_id INT NOT NULL,
+  trade_count INT NOT NULL DEFAULT 0,
+  roi_sum DECIMAL(20,2) NOT NULL DEFAULT 0,
+  roi_sq_sum DECIMAL(28,4) NOT NULL DEFAULT 0,
+  profit_count INT NOT NULL DEFAULT 0,
+  roi_missing_count INT NOT NULL DEFAULT 0,
+  hold_sum BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (politician_id),
+  CONSTRAINT fk_stats_politician FOREIGN KEY (politician_id) REFERENCES politicians (id)
+);
+
+-- Derived features; sample std from the running sums
+CREATE OR REPLACE VIEW politician_features AS
+SELECT
+  p.name AS politician,
+  s.politician_id,
+  s.trade_count,
+  s.roi_sum / s.trade_count AS avg_roi,
+  CASE WHEN s.trade_count > 1
+    THEN SQRT(GREATEST((s.roi_sq_sum - s.roi_sum * s.roi_sum / s.trade_count) / (s.trade_count - 1), 0))
+    ELSE 0 END AS std_roi,
+  s.profit_count / s.trade_count AS profit_rate,
+  s.hold_sum / s.trade_count AS avg_hold,
+  s.roi_missing_count / s.trade_count AS roi_missing_rate
+FROM politician_stats AS s
+JOIN politicians AS p ON p.id = s.politician_id
+WHERE s.trade_count > 0;
+
+DELIMITER $$
+
+-- Add (sign = 1) or remove (sign = -1) one trade's contribution
+CREATE PROCEDURE apply_trade_stats(
+  IN p_politician_id INT, IN p_sign INT,
+  IN p_roi DECIMAL(10,2), IN p_trade_dt DATE, IN p_published_dt DATE
+)
+BEGIN
+  IF p_politician_id IS NOT NULL THEN
+    INSERT INTO politician_stats
+      (politician_id, trade_count, roi_sum, roi_sq_sum, profit_count, roi_missing_count, hold_sum)
+    VALUES (
+      p_politician_id,
+      p_sign,
+      p_sign * COALESCE(p_roi, 0),
+      p_sign * COALESCE(p_roi, 0) * COALESCE(p_roi, 0),
+      p_sign * (COALESCE(p_roi, 0) > 0),
+      p_sign * (p_roi IS NULL),
+      p_sign * COALESCE(DATEDIFF(p_published_dt, p_trade_dt), 0)
+    )
+    ON DUPLICATE KEY UPDATE
+      trade_count = trade_count + VALUES(trade_count),
+      roi_sum = roi_sum + VALUES(roi_sum),
+      roi_sq_sum = roi_sq_sum + VALUES(roi_sq_sum),
+      profit_count = profit_count + VALUES(profit_count),
+      roi_missing_count = roi_missing_count + VALUES(roi_missing_count),
+      hold_sum = hold_sum + VALUES(hold_sum);
+  END IF;
+END$$
+
+CREATE TRIGGER trg_trades_stats_insert AFTER INSERT ON politician_trades
+FOR EACH ROW
+BEGIN
+  CALL apply_trade_stats(NEW.politician_id, 1, NEW.avg_roi, NEW.trade_dt, NEW.published_dt);
+END$$
+
+CREATE TRIGGER trg_trades_stats_update AFTER UPDATE ON politician_trades
+FOR EACH ROW
+BEGIN
+  IF NOT (OLD.politician_id <=> NEW.politician_id AND OLD.avg_roi <=> NEW.avg_roi
+          AND OLD.trade_dt <=> NEW.trade_dt AND OLD.published_dt <=> NEW.published_dt) THEN
+    CALL apply_trade_stats(OLD.politician_id, -1, OLD.avg_roi, OLD.trade_dt, OLD.published_dt);
+    CALL apply_trade_stats(NEW.politician_id, 1, NEW.avg_roi, NEW.trade_dt, NEW.published_dt);
+  END IF;
+END$$
+
+CREATE TRIGGER trg_trades_stats_delete AFTER DELETE ON politician_trades
+FOR EACH ROW
+BEGIN
+  CALL apply_trade_stats(OLD.politician_id, -1, OLD.avg_roi, OLD.trade_dt, OLD.published_dt);
+END$$
+
+DELIMITER ;
+
+-- Seed from the existing history (re-running this file rebuilds the table)
+DELETE FROM politician_stats;
+
+INSERT INTO politician_stats
+  (politician_id, trade_count, roi_sum, roi_sq_sum, profit_count, roi_missing_count, hold_sum)
+SELECT
+  politician_id,
+  COUNT(*),
+  SUM(COALESCE(avg_roi, 0)),
+  SUM(COALESCE(avg_roi, 0) * COALESCE(avg_roi, 0)),
+  SUM(COALESCE(avg_roi, 0) > 0),
+  SUM(avg_roi IS NULL),
+  SUM(COALESCE(DATEDIFF(published_dt, trade_dt), 0))
+FROM politician_trades
+WHERE politician_id IS NOT NULL
+GROUP BY politician_id;
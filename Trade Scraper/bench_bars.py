@@ -0,0 +1,59 @@
+"""Offline benchmark for the concurrent Alpaca bar fetcher.
+
+Runs fetch_bar_batches against StubBarsClient (tests/stub_bars.py), which
+fakes Alpaca's latency, per-symbol payload cost and transient failures, and
+prints wall-clock time for each batch size / worker count combination:
+
+    python bench_bars.py --symbols 500 --batch-sizes 10,25,50,100 --workers 1,2,4,8
+
+Bars are converted with bars_to_frame (as the real writer does) but not
+written anywhere, so no database or Alpaca account is needed.
+"""
+import os
+import sys
+import time
+import argparse
+import datascraper
+from datascraper import TokenBucket, fetch_bar_batches, bars_to_frame
+
+# the stub client is shared with the fetcher tests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests"))
+from stub_bars import StubBarsClient
+
+
+def run(symbols, batch_size, workers, rpm, client):
+    batches = [(datascraper.HISTORY_START, symbols[i:i+batch_size])
+               for i in range(0, len(symbols), batch_size)]
+    bucket = TokenBucket(rpm / 60)
+    start = time.perf_counter()
+    bars = failed = 0
+    for chunk, frame, err in fetch_bar_batches(client, batches, None, workers, bucket):
+        if err is not None:
+            failed += len(chunk)
+        else:
+            bars += len(bars_to_frame(frame))
+    return time.perf_counter() - start, bars, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--batch-sizes", default="10,25,50,100")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--rpm", type=float, default=0,
+                        help="rate limit in requests/minute (0 = unlimited)")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--per-symbol", type=float, default=0.004)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    # keep simulated retries short
+    datascraper.BAR_RETRY_BASE_DELAY = 0.05
+    symbols = [f"SYM{i:04d}" for i in range(args.symbols)]
+
+    print(f"{'batch':>6} {'workers':>8} {'wall_s':>8} {'bars':>9} {'calls':>6} {'failed':>7}")
+    for batch_size in map(int, args.batch_sizes.split(",")):
+        for workers in map(int, args.workers.split(",")):
+            client = StubBarsClient(args.latency, args.per_symbol, args.failure_rate)
+            wall, bars, failed = run(symbols, batch_size, workers, args.rpm, client)
+            print(f"{batch_size:>6} {workers:>8} {wall:>8.2f} {bars:>9} {client.calls:>6} {failed:>7}")
@@ -3,28 +3,41 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
+import sys
 import time
 import logging
 import re
+import hashlib
+import math
+import tempfile
+import threading
+import random
 import mysql.connector
-from datetime import datetime
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
 from tqdm import tqdm
 from selenium import webdriver
-from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
+from price_cache import PriceCache, PRICE_COLUMNS, EPOCH, get_price_cache
+
+# shared DB pool lives with the API in src/app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "app"))
+import db
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-db_config = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'root',
-    'database': 'trades_db'
-}
 DATE_FORMAT = "%d %b %Y"
 
 def safe_parse_date(s: str):
@@ -54,68 +67,332 @@ def adjust_ticker_for_alpaca(t: str):
     """Convert 'BRK/B' to 'BRK.B'."""
     return t.replace("/", ".") if "/" in t else t
 
-def get_db_connection():
-    """Open and return a MySQL connection."""
+def get_db_connection(**overrides):
+    """Check out a pooled MySQL connection; close() returns it to the pool."""
     try:
-        logger.info("Connecting to MySQL...")
-        return mysql.connector.connect(**db_config)
-    except mysql.connector.Error as e:
+        return db.get_db_connection(**overrides)
+    except (mysql.connector.Error, db.PoolTimeout) as e:
         logger.error(f"DB connection error: {e}")
         raise
 
-def get_max_trade_date_from_db():
-    """Return the most recent trade_date in politician_trades."""
-    try:
-        cnx = get_db_connection()
-        cur = cnx.cursor(dictionary=True)
-        cur.execute(
-            "SELECT MAX(STR_TO_DATE(trade_date, %s)) AS max_date "
-            "FROM politician_trades",
-            (DATE_FORMAT,)
-        )
-        row = cur.fetchone()
-        cur.close(); cnx.close()
-        return row['max_date'] if row and row['max_date'] else None
-    except Exception as e:
-        logger.error(f"Error fetching max trade date: {e}")
+def trade_hash(t):
+    """The trade's natural key, as MySQL computes politician_trades.trade_hash.
+
+    Mirrors the generated column in iteration11.sql: typed dates (falling back
+    to the scraped text), prices formatted like DECIMAL(10,2), 16 raw bytes.
+    """
+    def price(v):
+        return "" if v is None else f"{v:.2f}"
+
+    def day(typed, text):
+        return typed.isoformat() if typed else (text or "")
+
+    fields = (
+        t["politician"] or "", t["ticker"] or "",
+        day(t.get("trade_dt"), t["trade_date"]), day(t.get("published_dt"), t["published_date"]),
+        t["trade_type"] or "",
+        price(t["min_purchase_price"]), price(t["max_purchase_price"])
+    )
+    return hashlib.md5("\x1f".join(fields).encode("utf-8")).digest()
+
+UPSERT_WATERMARK_SQL = """
+    INSERT INTO scrape_watermarks (url, politician, trade_hash, published_dt)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+      politician = VALUES(politician), trade_hash = VALUES(trade_hash),
+      published_dt = VALUES(published_dt)
+"""
+
+class ScrapeWatermarks:
+    """Per-politician high-water marks for update scraping.
+
+    A page's watermark is the trade_hash and published_dt of the newest trade
+    stored from it. Pages list trades newest published first, so an update
+    scrape stops at that trade, or at the first trade published before it
+    (in case that trade was removed from the site); a politician with nothing
+    new costs a single page fetch. Pages without a stored watermark (e.g.
+    before their first run after iteration10.sql) stop at trades published
+    before that politician's latest published_dt in politician_trades.
+
+    A watermark only advances when the politician's scrape finished cleanly
+    and every one of its trades was stored, so a failed page or row is
+    picked up again by the next update.
+    """
+
+    def __init__(self, by_url=None, cutoffs=None):
+        self.by_url = by_url or {}
+        self.cutoffs = cutoffs or {}
+        self.heads = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        with get_db_connection() as cnx:
+            cur = cnx.cursor(dictionary=True)
+            try:
+                cur.execute("SELECT url, trade_hash, published_dt FROM scrape_watermarks")
+                by_url = {
+                    r["url"]: {"trade_hash": bytes(r["trade_hash"]), "published_dt": r["published_dt"]}
+                    for r in cur.fetchall()
+                }
+                cur.execute(
+                    "SELECT politician, MAX(published_dt) AS published_dt FROM politician_trades "
+                    "WHERE published_dt IS NOT NULL GROUP BY politician"
+                )
+                cutoffs = {r["politician"]: r["published_dt"] for r in cur.fetchall()}
+            finally:
+                cur.close()
+        logger.info(f"Loaded {len(by_url)} page watermarks, {len(cutoffs)} politician cutoffs")
+        return cls(by_url, cutoffs)
+
+    def for_page(self, url, name):
+        """The watermark to stop at for this page, or None to scrape it all."""
+        if url in self.by_url:
+            return self.by_url[url]
+        if self.cutoffs.get(name):
+            return {"published_dt": self.cutoffs[name]}
         return None
 
+    def record(self, url, trades):
+        """Remember the newest trade from a cleanly finished scrape of url.
+
+        trades are newest first; only call this once the politician's pages
+        were read up to the old watermark or the last page.
+        """
+        if trades:
+            with self._lock:
+                self.heads[url] = trades[0]
+
+    def save(self, failed=()):
+        """Advance the stored watermarks; call once the trades are inserted.
+
+        Politicians in `failed` had trades that weren't stored; their
+        watermarks stay where they were.
+        """
+        skipped = [url for url, t in self.heads.items() if t["politician"] in failed]
+        for url in skipped:
+            del self.heads[url]
+        if skipped:
+            logger.warning(f"Not advancing watermarks for {len(skipped)} politicians with unstored trades")
+        if not self.heads:
+            return
+        rows = [
+            (url, t["politician"], trade_hash(t), t.get("published_dt"))
+            for url, t in self.heads.items()
+        ]
+        with get_db_connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                cur.executemany(UPSERT_WATERMARK_SQL, rows)
+                cnx.commit()
+            finally:
+                cur.close()
+        for url, t in self.heads.items():
+            self.by_url[url] = {"trade_hash": trade_hash(t), "published_dt": t.get("published_dt")}
+        logger.info(f"Advanced watermarks for {len(rows)} politicians")
+        self.heads = {}
+
 def fetch_distinct_tickers_from_db():
     """Fetch unique valid tickers from politician_trades."""
     try:
-        cnx = get_db_connection()
-        cur = cnx.cursor()
-        cur.execute(
-            "SELECT DISTINCT ticker FROM politician_trades "
-            "WHERE ticker IS NOT NULL AND ticker <> 'N/A'"
-        )
-        tickers = {r[0].strip() for r in cur.fetchall() if r[0].strip()}
-        cur.close(); cnx.close()
+        with get_db_connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                cur.execute(
+                    "SELECT DISTINCT ticker FROM politician_trades "
+                    "WHERE ticker IS NOT NULL AND ticker <> 'N/A'"
+                )
+                tickers = {r[0].strip() for r in cur.fetchall() if r[0].strip()}
+            finally:
+                cur.close()
         return {t for t in tickers if is_valid_ticker(t)}
     except Exception as e:
         logger.error(f"Error fetching tickers: {e}")
         return set()
 
-def get_historical_price(symbol: str, date_str: str, price_type="close"):
-    """Return (price, timestamp) nearest to date_str."""
+def get_historical_price(symbol: str, date_str: str, price_type="close", index=None):
+    """Return (price, timestamp) nearest to date_str.
+
+    If a PriceIndex is given the lookup is served from memory instead of SQL.
+    """
     dt = safe_parse_date(date_str)
     if not dt:
         return None, None
-    cnx = get_db_connection()
-    cur = cnx.cursor(dictionary=True)
+    if index is not None and index.price_type == price_type:
+        return index.nearest(symbol, dt)
     query = (
         f"SELECT timestamp, {price_type} FROM historical_trades "
         "WHERE symbol=%s "
         "ORDER BY ABS(TIMESTAMPDIFF(SECOND, timestamp, %s)) "
         "LIMIT 1"
     )
-    cur.execute(query, (symbol, dt))
-    row = cur.fetchone()
-    cur.close(); cnx.close()
+    with get_db_connection() as cnx:
+        cur = cnx.cursor(dictionary=True)
+        try:
+            cur.execute(query, (symbol, dt))
+            row = cur.fetchone()
+        finally:
+            cur.close()
     if row and row[price_type] is not None:
         return float(row[price_type]), row['timestamp']
     return None, None
 
+class PriceIndex:
+    """In-memory nearest-bar lookup over historical_trades.
+
+    Each symbol's bars are held as sorted float64 timestamp and price columns,
+    so a lookup is a binary search with no SQL round trip. Symbols in the
+    on-disk PriceCache are memory-mapped straight from it as long as their
+    last timestamp and bar count still match historical_trades; the rest are
+    read from MySQL once and written to the cache for next time. Ties resolve
+    to the earlier bar (lowest id among equal timestamps).
+    """
+
+    def __init__(self, price_type="close", chunk_size=500, cache=None):
+        if price_type not in PRICE_COLUMNS:
+            raise ValueError(f"Unsupported price type: {price_type}")
+        self.price_type = price_type
+        self.chunk_size = chunk_size
+        self.cache = cache if cache is not None else get_price_cache()
+        self._series = {}
+
+    _key = staticmethod(PriceCache.key)
+
+    def preload(self, symbols):
+        """Map up-to-date cached symbols; load the rest in a few IN (...) queries."""
+        pending = sorted({self._key(s) for s in symbols if s} - self._series.keys())
+        if not pending:
+            return
+        current = self._bar_stats(pending) if self.cache else {}
+        missing, stale = [], 0
+        for s in pending:
+            hit = self.cache.load(s, self.price_type) if self.cache else None
+            if hit is not None and not self._matches(hit[0], current.get(s)):
+                hit = None
+                stale += 1
+            if hit is not None:
+                self._series[s] = hit
+            else:
+                missing.append(s)
+        if missing:
+            self._load_from_db(missing)
+        logger.info(f"Indexed bars for {len(pending)} symbols "
+                    f"({len(pending) - len(missing)} from the price cache, {stale} stale)")
+
+    def _bar_stats(self, symbols):
+        """{symbol: (last bar seconds, bar count)} as stored in historical_trades."""
+        stats = {}
+        with get_db_connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                for i in range(0, len(symbols), self.chunk_size):
+                    chunk = symbols[i:i+self.chunk_size]
+                    marks = ",".join(["%s"] * len(chunk))
+                    cur.execute(
+                        "SELECT symbol, MAX(timestamp), COUNT(*) FROM historical_trades "
+                        f"WHERE symbol IN ({marks}) GROUP BY symbol",
+                        tuple(chunk)
+                    )
+                    for sym, last, count in cur:
+                        last_s, n = stats.get(self._key(sym), (-math.inf, 0))
+                        stats[self._key(sym)] = (max(last_s, (last - EPOCH).total_seconds()), n + count)
+            finally:
+                cur.close()
+        return stats
+
+    @staticmethod
+    def _matches(secs, stats):
+        """True if cached timestamps agree with the database's (last, count)."""
+        if stats is None:
+            return len(secs) == 0
+        last, count = stats
+        return len(secs) == count and count > 0 and secs[-1] == last
+
+    def _load_from_db(self, symbols):
+        rows = {s: [] for s in symbols}
+        with get_db_connection() as cnx:
+            cur = cnx.cursor()
+            try:
+                for i in range(0, len(symbols), self.chunk_size):
+                    chunk = symbols[i:i+self.chunk_size]
+                    marks = ",".join(["%s"] * len(chunk))
+                    cur.execute(
+                        f"SELECT symbol, timestamp, {', '.join(PRICE_COLUMNS)} FROM historical_trades "
+                        f"WHERE symbol IN ({marks}) "
+                        "ORDER BY symbol, timestamp, id",
+                        tuple(chunk)
+                    )
+                    for sym, ts, *prices in cur:
+                        rows.setdefault(self._key(sym), []).append(
+                            ((ts - EPOCH).total_seconds(),
+                             *(float(p) if p is not None else math.nan for p in prices))
+                        )
+            finally:
+                cur.close()
+
+        for key, bars in rows.items():
+            table = np.array(bars, dtype=float).reshape(-1, 1 + len(PRICE_COLUMNS))
+            secs = table[:, 0]
+            columns = dict(zip(PRICE_COLUMNS, table[:, 1:].T))
+            self._series[key] = (secs, columns[self.price_type])
+            if self.cache and len(np.unique(secs)) == len(secs):
+                try:
+                    self.cache.write(key, secs, columns)
+                except OSError as e:
+                    logger.warning(f"Could not cache bars for {key}: {e}")
+
+    def nearest(self, symbol, dt):
+        """Return (price, timestamp) of the bar closest to dt, or (None, None)."""
+        key = self._key(symbol)
+        if key not in self._series:
+            self.preload([key])
+        secs, prices = self._series[key]
+        n = len(secs)
+        if not n:
+            return None, None
+
+        x = (dt - EPOCH).total_seconds()
+        i = int(np.searchsorted(secs, x, side="left"))
+        if i == 0:
+            j = 0
+        elif i == n:
+            j = i - 1
+        else:
+            j = i - 1 if x - secs[i-1] <= secs[i] - x else i
+        # first of any run of duplicate timestamps, as the SQL scan would see it
+        j = int(np.searchsorted(secs, secs[j], side="left"))
+
+        if math.isnan(prices[j]):
+            return None, None
+        return float(prices[j]), EPOCH + timedelta(seconds=float(secs[j]))
+
+    def nearest_many(self, symbols, when):
+        """Vectorized nearest(): one price per (symbol, datetime) pair, NaN if none.
+
+        symbols and when are equal-length sequences; when may contain NaT.
+        """
+        keys = pd.Series([self._key(s) for s in symbols])
+        self.preload(keys.unique())
+        x = ((pd.to_datetime(pd.Series(when)) - EPOCH) / pd.Timedelta(seconds=1)).to_numpy(float)
+        out = np.full(len(keys), np.nan)
+
+        for key, pos in keys.groupby(keys).indices.items():
+            secs, prices = self._series[key]
+            n = len(secs)
+            if not n:
+                continue
+            pos = pos[~np.isnan(x[pos])]
+            xs = x[pos]
+
+            i = np.searchsorted(secs, xs, side="left")
+            left = np.clip(i - 1, 0, n - 1)
+            right = np.clip(i, 0, n - 1)
+            take_left = (i == n) | ((i > 0) & (xs - secs[left] <= secs[right] - xs))
+            j = np.where(take_left, left, right)
+            j = np.searchsorted(secs, secs[j], side="left")
+            out[pos] = prices[j]
+        return out
+
 def get_current_price(_: str):
     """Dummy fallback price."""
     return 150.0
@@ -140,14 +417,16 @@ def parse_trade_size(txt: str):
         return n1*m1, n2*m2
     return None, None
 
-def calculate_roi_range(min_amt, max_amt, symbol, buy_dt, sell_dt):
+def calculate_roi_range(min_amt, max_amt, symbol, buy_dt, sell_dt, index=None):
     """Compute worst/best/average ROI%."""
     try:
-        bp,_ = get_historical_price(symbol, buy_dt)
-        sp,_ = get_historical_price(symbol, sell_dt)
+        bp,_ = get_historical_price(symbol, buy_dt, index=index)
+        sp,_ = get_historical_price(symbol, sell_dt, index=index)
         if not bp: bp = get_current_price(symbol)
         if not sp: sp = get_current_price(symbol)
         if min_amt is not None and max_amt is not None:
+            # DECIMAL columns arrive as Decimal, which won't mix with float prices
+            min_amt, max_amt = float(min_amt), float(max_amt)
             worst = ((sp - max_amt) / max_amt) * 100 if max_amt else None
             best  = ((sp - min_amt) / min_amt) * 100 if min_amt else None
             avg   = (worst + best)/2 if worst is not None and best is not None else None
@@ -162,88 +441,364 @@ def calculate_roi_range(min_amt, max_amt, symbol, buy_dt, sell_dt):
         logger.error(f"ROI error for {symbol}: {e}")
         return None, None, None
 
-def scrape_politician_page(url, max_pages=10, update_mode=False, cutoff_date=None):
-    """Scrape trades from one politician's page."""
+SCRAPE_WORKERS = 4
+PAGE_TIMEOUT = 10
+HTTP_TIMEOUT = 15
+# "selenium" drives headless Chrome; "http" fetches plain HTML and only falls
+# back to Chrome for a politician whose page can't be parsed that way
+SCRAPE_BACKEND = os.getenv("SCRAPE_BACKEND", "selenium")
+# backend for 2: Update Trades, where most pages have nothing new; set it to
+# "http" to probe those pages without a browser
+SCRAPE_UPDATE_BACKEND = os.getenv("SCRAPE_UPDATE_BACKEND", SCRAPE_BACKEND)
+TRADE_ROW_SELECTOR = "table.w-full tbody tr"
+TRADE_ROW_CELLS = 7
+
+# "rows" once a full trade row is rendered, "empty" once the page shows it has
+# none (an empty-state row or an empty tbody, or pagination with no table, as
+# past the last page), null while still loading
+PAGE_STATE_SCRIPT = f"""
+const rows = Array.from(document.querySelectorAll('{TRADE_ROW_SELECTOR}'));
+if (rows.some(tr => tr.querySelectorAll('td').length >= {TRADE_ROW_CELLS})) return 'rows';
+if (rows.length || document.querySelector('table.w-full tbody')) return 'empty';
+const text = document.body ? document.body.innerText : '';
+if (!document.querySelector('table.w-full') && /Page\\s+\\d+\\s+of\\s+\\d+/i.test(text)) return 'empty';
+return null;
+"""
+
+# seconds each scraped page took to become ready; see latency_summary()
+page_latencies = []
+_latency_lock = threading.Lock()
+
+def load_page(driver, url, timeout=PAGE_TIMEOUT):
+    """Open url and wait until it shows trade rows or that it has none.
+
+    Returns "rows", "empty" (e.g. the page after the last one, which no
+    longer waits out the full timeout) or None on timeout. The elapsed time
+    is appended to page_latencies either way.
+    """
+    start = time.perf_counter()
+    driver.get(url)
+    try:
+        state = WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script(PAGE_STATE_SCRIPT)
+        )
+    except TimeoutException:
+        logger.warning(f"Timed out after {timeout}s waiting for trades on {url}")
+        state = None
+    with _latency_lock:
+        page_latencies.append(time.perf_counter() - start)
+    return state
+
+def latency_summary(samples):
+    """Return count and p50/p90/p99/max (ms) of latencies in seconds."""
+    return {"count": len(samples), **db.summary_ms(samples, (0.50, 0.90, 0.99))}
+
+def new_driver():
+    """Launch a headless Chrome driver."""
     opts = Options(); opts.add_argument("--headless")
-    driver = webdriver.Chrome(options=opts)
-    driver.get(url); time.sleep(1)
+    return webdriver.Chrome(options=opts)
 
-    # header
+def scrape_politician_page(url, max_pages=10, update_mode=False, watermarks=None, driver=None):
+    """Scrape trades from one politician's page.
+
+    Returns (trades, complete); complete is False if a page failed to load
+    or max_pages ran out first. In update mode scraping stops at the
+    politician's watermark (see ScrapeWatermarks). Pass a driver to reuse an
+    existing browser; otherwise one is launched for this page and quit
+    afterwards.
+    """
+    owns_driver = driver is None
+    if owns_driver:
+        driver = new_driver()
     try:
-        name    = driver.find_element(By.CSS_SELECTOR, "article.politician-detail-card h1").text
-        party   = driver.find_element(By.CSS_SELECTOR, "span.q-field.party").text
-        chamber = driver.find_element(By.CSS_SELECTOR, "span.q-field.chamber").text
-        state   = driver.find_element(By.CSS_SELECTOR, "span.q-field.us-state-full").text
-    except Exception:
-        name, party, chamber, state = "Unknown", "Unknown", "Unknown", "Unknown"
+        return _scrape_with_driver(driver, url, max_pages, update_mode, watermarks)
+    finally:
+        if owns_driver:
+            driver.quit()
+
+# One round trip each: header fields and every trade-table row as plain text.
+HEADER_SCRIPT = """
+const text = sel => { const el = document.querySelector(sel); return el ? el.innerText.trim() : null; };
+const img = document.querySelector('img.republican') || document.querySelector('img.democrat');
+return {
+  name: text('article.politician-detail-card h1'),
+  party: text('span.q-field.party'),
+  chamber: text('span.q-field.chamber'),
+  state: text('span.q-field.us-state-full'),
+  image: img ? img.src : null
+};
+"""
 
-    # image
+ROWS_SCRIPT = """
+const table = document.querySelector('table.w-full');
+if (!table) return null;
+return Array.from(table.querySelectorAll('tr')).map(tr => {
+  const tds = Array.from(tr.querySelectorAll('td'));
+  const tk = tds.length ? tds[0].querySelector('span.q-field.issuer-ticker') : null;
+  return [tds.map(td => td.innerText.trim()), tk ? tk.innerText.trim() : null];
+});
+"""
+
+def parse_header(fields):
+    """Normalise extracted header fields; any missing field means all Unknown."""
+    keys = ("name", "party", "chamber", "state")
+    if any(fields.get(k) is None for k in keys):
+        header = dict.fromkeys(keys, "Unknown")
+    else:
+        header = {k: fields[k] for k in keys}
+    header["image"] = fields.get("image")
+    return header
+
+def _as_date(dt):
+    return dt.date() if dt else None
+
+def parse_trade_rows(rows, header, page, watermark=None):
+    """Turn extracted (cell_texts, ticker_text) rows into trade dicts.
+
+    Returns (trades, reached_watermark). Parsing stops at the first trade whose
+    trade_hash matches watermark["trade_hash"], or that was published before
+    watermark["published_dt"]. Trades published on that day are kept; they
+    upsert harmlessly if already stored.
+    """
+    trades = []
+    for cells, ticker_text in rows:
+        if len(cells) < TRADE_ROW_CELLS:
+            continue
+
+        traded_issuer = cells[0].strip()
+        ticker_raw    = (ticker_text or "").split(":")[0].strip()
+        if not is_valid_ticker(ticker_raw):
+            continue
+
+        pub = " ".join(cells[1].splitlines())
+        td  = " ".join(cells[2].splitlines())
+        gap = cells[3].strip()
+        tt  = cells[4].strip()
+        mn, mx = parse_trade_size(cells[5])
+
+        trade = {
+            "politician": header["name"], "party": header["party"],
+            "chamber": header["chamber"], "state": header["state"],
+            "traded_issuer": traded_issuer, "ticker": ticker_raw,
+            "published_date": pub, "trade_date": td,
+            "published_dt": _as_date(safe_parse_date(pub)), "trade_dt": _as_date(safe_parse_date(td)),
+            "gap": gap, "trade_type": tt, "page": page,
+            "min_purchase_price": mn, "max_purchase_price": mx, "image": header["image"]
+        }
+        if watermark:
+            if watermark.get("trade_hash") and trade_hash(trade) == watermark["trade_hash"]:
+                return trades, True
+            cutoff = watermark.get("published_dt")
+            if cutoff and trade["published_dt"] and trade["published_dt"] < cutoff:
+                return trades, True
+        trades.append(trade)
+    return trades, False
+
+def _scrape_with_driver(driver, url, max_pages, update_mode, watermarks):
+    state = load_page(driver, url)
+    if state is None:
+        # header and rows may be half-rendered; don't store trades as "Unknown"
+        logger.error(f"Giving up on {url}: first page never finished loading")
+        return [], False
+    if state == "empty":
+        logger.info(f"No trades listed on {url}")
+        return [], True
+    header = parse_header(driver.execute_script(HEADER_SCRIPT) or {})
+    watermark = watermarks.for_page(url, header["name"]) if update_mode and watermarks else None
+
+    trades = []
+    for page in tqdm(range(1, max_pages+1), desc=f"Scraping pages for {header['name']}"):
+        if page > 1:
+            state = load_page(driver, f"{url}?page={page}")
+            if state != "rows":
+                return trades, state == "empty"
+        rows = driver.execute_script(ROWS_SCRIPT)
+        if rows is None:
+            return trades, True
+
+        page_trades, reached_watermark = parse_trade_rows(rows, header, page, watermark)
+        trades += page_trades
+        if reached_watermark or not page_trades:
+            return trades, True
+
+    return trades, False
+
+def new_http_session(pool_size=SCRAPE_WORKERS):
+    """Return a requests session with a pooled, retrying HTTPS adapter."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=2)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "Mozilla/5.0 (compatible; politrade-scraper)"
+    return session
+
+def parse_politician_html(html, base_url=""):
+    """Parse a politician page's HTML into (header fields, rows).
+
+    The output has the same shape as HEADER_SCRIPT / ROWS_SCRIPT, so it feeds
+    parse_header and parse_trade_rows unchanged. rows is None when the page
+    has no trade table.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+
+    def text(sel):
+        el = soup.select_one(sel)
+        return el.get_text("\n", strip=True) if el else None
+
+    img = soup.select_one("img.republican") or soup.select_one("img.democrat")
+    fields = {
+        "name": text("article.politician-detail-card h1"),
+        "party": text("span.q-field.party"),
+        "chamber": text("span.q-field.chamber"),
+        "state": text("span.q-field.us-state-full"),
+        "image": urljoin(base_url, img["src"]) if img and img.get("src") else None,
+    }
+
+    table = soup.select_one("table.w-full")
+    if table is None:
+        return fields, None
+    rows = []
+    for tr in table.find_all("tr"):
+        tds = tr.find_all("td")
+        tk = tds[0].select_one("span.q-field.issuer-ticker") if tds else None
+        rows.append((
+            [td.get_text("\n", strip=True) for td in tds],
+            tk.get_text(strip=True) if tk else None
+        ))
+    return fields, rows
+
+def _fetch_html(session, url):
+    start = time.perf_counter()
     try:
-        img = driver.find_element(By.CSS_SELECTOR, "img.republican").get_attribute("src")
-    except:
-        try:
-            img = driver.find_element(By.CSS_SELECTOR, "img.democrat").get_attribute("src")
-        except:
-            img = None
+        resp = session.get(url, timeout=HTTP_TIMEOUT)
+        resp.raise_for_status()
+        return resp.text
+    finally:
+        with _latency_lock:
+            page_latencies.append(time.perf_counter() - start)
+
+def scrape_politician_page_http(url, session, max_pages=10, update_mode=False, watermarks=None):
+    """Scrape one politician over plain HTTP.
+
+    Returns (trades, complete) like scrape_politician_page, or None if the
+    first page can't be fetched or parsed, so the caller can fall back to
+    the browser.
+    """
+    try:
+        fields, rows = parse_politician_html(_fetch_html(session, url), url)
+    except Exception as e:
+        logger.warning(f"HTTP fetch failed for {url}: {e}")
+        return None
+    header = parse_header(fields)
+    if rows is None or header["name"] == "Unknown":
+        return None
+    watermark = watermarks.for_page(url, header["name"]) if update_mode and watermarks else None
 
     trades = []
-    for page in tqdm(range(1, max_pages+1), desc=f"Scraping pages for {name}"):
-        page_url = url if page==1 else f"{url}?page={page}"
-        driver.get(page_url); time.sleep(1)
-        try:
-            rows = driver.find_element(By.CSS_SELECTOR, "table.w-full") \
-                         .find_elements(By.TAG_NAME, "tr")
-        except:
-            break
+    for page in range(1, max_pages+1):
+        if page > 1:
+            page_url = f"{url}?page={page}"
+            try:
+                fields, rows = parse_politician_html(_fetch_html(session, page_url), page_url)
+            except Exception as e:
+                logger.error(f"HTTP fetch failed for {page_url}: {e}")
+                return trades, False
+            if rows is None:
+                return trades, True
 
-        valid = 0
-        for r in rows:
-            cells = r.find_elements(By.TAG_NAME, "td")
-            if len(cells) < 7:
-                continue
+        page_trades, reached_watermark = parse_trade_rows(rows, header, page, watermark)
+        trades += page_trades
+        if reached_watermark or not page_trades:
+            return trades, True
 
-            traded_issuer = cells[0].text.strip()
-            ticker_raw    = cells[0].find_element(By.CSS_SELECTOR, "span.q-field.issuer-ticker") \
-                                  .text.split(":")[0].strip()
-            if not is_valid_ticker(ticker_raw):
-                continue
+    return trades, False
 
-            pub = " ".join(cells[1].text.splitlines())
-            td  = " ".join(cells[2].text.splitlines())
-            gap = cells[3].text.strip()
-            tt  = cells[4].text.strip()
-            mn, mx = parse_trade_size(cells[5].text)
-
-            dt_obj = safe_parse_date(td)
-            if update_mode and cutoff_date and dt_obj and dt_obj.date() <= cutoff_date:
-                driver.quit()
-                return trades
-
-            trades.append({
-                "politician": name, "party": party, "chamber": chamber, "state": state,
-                "traded_issuer": traded_issuer, "ticker": ticker_raw,
-                "published_date": pub, "trade_date": td,
-                 "gap": gap, "trade_type": tt, "page": page,
-                "min_purchase_price": mn, "max_purchase_price": mx, "image": img
-            })
-            valid += 1
-
-        if valid == 0:
-            break
+def dedupe_urls(urls):
+    """Drop repeated URLs, keeping first-seen order."""
+    return list(dict.fromkeys(u.strip().rstrip("/") for u in urls))
 
-    driver.quit()
-    return trades
+def scrape_politicians(urls, workers=SCRAPE_WORKERS, backend=SCRAPE_BACKEND, watermarks=None,
+                       **scrape_kwargs):
+    """Scrape politician pages on a bounded pool of reusable workers.
 
-def insert_trades_into_db(trades):
-    cnx = get_db_connection()
-    cursor = cnx.cursor()
-    q = """
+    Each worker thread keeps one HTTP session and, when needed, one Chrome
+    instance for all the pages it handles. Yields each politician's trade list
+    as soon as that politician finishes. If watermarks is given, the newest
+    trade of each politician whose scrape completed is recorded in it.
+    """
+    urls = dedupe_urls(urls)
+    local = threading.local()
+    drivers, sessions = [], []
+    lock = threading.Lock()
+
+    def work(url):
+        if backend == "http":
+            if getattr(local, "session", None) is None:
+                local.session = new_http_session()
+                with lock:
+                    sessions.append(local.session)
+            result = scrape_politician_page_http(url, local.session, watermarks=watermarks,
+                                                 **scrape_kwargs)
+            if result is not None:
+                return result
+            logger.info(f"Falling back to browser for {url}")
+
+        driver = getattr(local, "driver", None)
+        if driver is None:
+            driver = local.driver = new_driver()
+            with lock:
+                drivers.append(driver)
+        try:
+            return scrape_politician_page(url, driver=driver, watermarks=watermarks, **scrape_kwargs)
+        except Exception:
+            # browser may be wedged; relaunch on this worker's next task
+            local.driver = None
+            with lock:
+                drivers.remove(driver)
+            driver.quit()
+            raise
+
+    logger.info(f"Scraping {len(urls)} politicians with {workers} {backend} workers")
+    with _latency_lock:
+        page_latencies.clear()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(work, u): u for u in urls}
+            try:
+                for fut in as_completed(futures):
+                    url = futures[fut]
+                    try:
+                        trades, complete = fut.result()
+                    except Exception as e:
+                        logger.error(f"Scrape failed for {url}: {e}")
+                        continue
+                    if watermarks is not None:
+                        if complete:
+                            watermarks.record(url, trades)
+                        else:
+                            logger.warning(f"Scrape of {url} stopped early; keeping its watermark")
+                    yield trades
+            finally:
+                for fut in futures:
+                    fut.cancel()
+    finally:
+        for d in drivers:
+            d.quit()
+        for sess in sessions:
+            sess.close()
+        logger.info(f"Page load latency (ms): {latency_summary(page_latencies)}")
+
+INSERT_BATCH_SIZE = 500
+
+INSERT_TRADE_SQL = """
     INSERT INTO politician_trades (
       politician,
+      politician_id,
       traded_issuer,
       ticker,
       published_date,
+      published_dt,
       trade_date,
+      trade_dt,
       gap,
       trade_type,
       page,
@@ -258,298 +813,868 @@ def insert_trades_into_db(trades):
       image,
       confidence_score
     ) VALUES (
-      %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+      %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
     )
+    ON DUPLICATE KEY UPDATE
+      politician_id = VALUES(politician_id),
+      traded_issuer = VALUES(traded_issuer),
+      gap = VALUES(gap),
+      page = VALUES(page),
+      party = VALUES(party),
+      chamber = VALUES(chamber),
+      state = VALUES(state),
+      image = VALUES(image)
     """
-    for t in tqdm(trades, desc="Inserting trades"):
-        vals = (
-            t["politician"],
-            t["traded_issuer"],
-            t["ticker"],
-            t["published_date"],
-            t["trade_date"],
-            t["gap"],
-            t["trade_type"],
-            t["page"],
-            t["party"],
-            t["chamber"],
-            t["state"],
-            t["min_purchase_price"],
-            t["max_purchase_price"],
-            None,        
-            None,       
-            None,        
-            t["image"],
-            None        
-        )
+
+UPSERT_POLITICIAN_SQL = """
+    INSERT INTO politicians (name, party, chamber, state, image)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+      id = LAST_INSERT_ID(id),
+      party = VALUES(party), chamber = VALUES(chamber),
+      state = VALUES(state), image = VALUES(image)
+"""
+
+def upsert_politician(cnx, cursor, t):
+    """Insert or refresh a politician's header fields and return their id."""
+    cursor.execute(UPSERT_POLITICIAN_SQL, (
+        t["politician"], t["party"], t["chamber"], t["state"], t["image"]
+    ))
+    cnx.commit()
+    return cursor.lastrowid
+
+def trade_to_row(t):
+    """Map a scraped trade dict onto the INSERT_TRADE_SQL column order."""
+    return (
+        t["politician"],
+        t.get("politician_id"),
+        t["traded_issuer"],
+        t["ticker"],
+        t["published_date"],
+        t.get("published_dt"),
+        t["trade_date"],
+        t.get("trade_dt"),
+        t["gap"],
+        t["trade_type"],
+        t["page"],
+        t["party"],
+        t["chamber"],
+        t["state"],
+        t["min_purchase_price"],
+        t["max_purchase_price"],
+        None,
+        None,
+        None,
+        t["image"],
+        None
+    )
+
+def _flush_trade_batch(cnx, cursor, rows, failed=None):
+    """Insert one batch in a single transaction; return the number of rows stored.
+
+    If the multi-row insert fails the batch is rolled back and replayed row by
+    row, so a bad row is logged and dropped without losing its neighbours.
+    The politician of each dropped row is added to `failed` if given.
+    """
+    start = time.perf_counter()
+    try:
+        cursor.executemany(INSERT_TRADE_SQL, rows)
+        cnx.commit()
+        stored = len(rows)
+    except Exception as e:
+        logger.warning(f"Batch insert failed ({e}); retrying {len(rows)} rows individually")
+        cnx.rollback()
+        stored = 0
+        for vals in rows:
+            try:
+                cursor.execute(INSERT_TRADE_SQL, vals)
+                stored += 1
+            except Exception as row_err:
+                logger.error(f"Insert error for {vals[0]} {vals[2]} {vals[4]}: {row_err}")
+                if failed is not None:
+                    failed.add(vals[0])
+        cnx.commit()
+    elapsed = time.perf_counter() - start
+    rate = stored / elapsed if elapsed > 0 else float("inf")
+    logger.info(f"Inserted {stored}/{len(rows)} trades in {elapsed:.2f}s ({rate:.0f} rows/s)")
+    return stored
+
+def insert_trades_into_db(trades, batch_size=INSERT_BATCH_SIZE, failed=None):
+    """Upsert trades in executemany batches, committing once per batch.
+
+    A trade already stored under the same natural key (uq_trade_hash, see
+    iteration11.sql) only has its page and header fields refreshed, so
+    re-scraping is idempotent and existing ROI values are kept. Politicians
+    with a trade that couldn't be stored, or whose politicians row couldn't
+    be upserted, are added to `failed` if given.
+    """
+    cnx = get_db_connection()
+    total = stored = 0
+    batch = []
+    politician_ids = {}
+    try:
+        cursor = cnx.cursor()
+        for t in tqdm(trades, desc="Inserting trades"):
+            name = t["politician"]
+            if name not in politician_ids:
+                try:
+                    politician_ids[name] = upsert_politician(cnx, cursor, t)
+                except Exception as e:
+                    logger.error(f"Politician upsert failed for {name}: {e}")
+                    cnx.rollback()
+                    politician_ids[name] = None
+                    if failed is not None:
+                        failed.add(name)
+            t["politician_id"] = politician_ids[name]
+            batch.append(trade_to_row(t))
+            if len(batch) >= batch_size:
+                stored += _flush_trade_batch(cnx, cursor, batch, failed)
+                total += len(batch)
+                batch = []
+        if batch:
+            stored += _flush_trade_batch(cnx, cursor, batch, failed)
+            total += len(batch)
+        cursor.close()
+    finally:
+        cnx.close()
+    logger.info(f"Stored {stored} of {total} trades")
+    return stored
+
+
+def parse_date_column(col):
+    """Vectorized safe_parse_date: datetime64 series with NaT for bad values."""
+    return pd.to_datetime(
+        col.astype("string").str.replace("Sept", "Sep", regex=False),
+        format=DATE_FORMAT, errors="coerce"
+    )
+
+def date_column(df, typed, raw):
+    """Dates for a frame, preferring the typed DATE column over parsing text."""
+    if typed in df:
+        return pd.to_datetime(df[typed], errors="coerce")
+    return parse_date_column(df[raw])
+
+def _round_col(values):
+    # Python round() per value so results match calculate_roi_range exactly
+    return [round(v, 2) if not math.isnan(v) else None for v in values]
+
+def compute_trade_rois(trades, index):
+    """Vectorized calculate_roi_range over a frame of trades.
+
+    trades needs id, ticker, min_purchase_price, max_purchase_price and either
+    the typed trade_dt/published_dt columns or the trade_date/published_date
+    strings. Returns (id, min_roi, max_roi, avg_roi) rows.
+    """
+    if trades.empty:
+        return []
+    tickers = trades["ticker"].tolist()
+    bp = index.nearest_many(tickers, date_column(trades, "trade_dt", "trade_date"))
+    sp = index.nearest_many(tickers, date_column(trades, "published_dt", "published_date"))
+
+    fallback = trades["ticker"].map(
+        {t: get_current_price(t) for t in trades["ticker"].unique()}
+    ).to_numpy(float)
+    bp = np.where(np.isnan(bp) | (bp == 0), fallback, bp)
+    sp = np.where(np.isnan(sp) | (sp == 0), fallback, sp)
+
+    mn = pd.to_numeric(trades["min_purchase_price"], errors="coerce").to_numpy(float)
+    mx = pd.to_numeric(trades["max_purchase_price"], errors="coerce").to_numpy(float)
+    has_range = ~np.isnan(mn) & ~np.isnan(mx)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        simple = np.where(bp != 0, (sp - bp) / bp * 100, np.nan)
+        worst = np.where(mx != 0, (sp - mx) / mx * 100, np.nan)
+        best = np.where(mn != 0, (sp - mn) / mn * 100, np.nan)
+    avg = np.where(has_range, (worst + best) / 2, simple)
+    worst = np.where(has_range, worst, simple)
+    best = np.where(has_range, best, simple)
+
+    return list(zip(
+        trades["id"].tolist(), _round_col(worst), _round_col(best), _round_col(avg)
+    ))
+
+ROI_WRITE_BATCH_SIZE = 1000
+
+def _update_from_temp_table(cnx, table, columns, rows, update_sql, cleanup=None):
+    """Stage rows in a temporary table and apply them with one joined UPDATE.
+
+    columns is the temp table's column DDL; rows must match its column order.
+    cleanup, an optional (sql, params_seq) pair, runs in the same transaction.
+    """
+    cur = cnx.cursor()
+    try:
+        cur.execute(f"CREATE TEMPORARY TABLE {table} ({columns})")
+        marks = ",".join(["%s"] * len(rows[0])) if rows else ""
+        for i in range(0, len(rows), ROI_WRITE_BATCH_SIZE):
+            cur.executemany(
+                f"INSERT INTO {table} VALUES ({marks})",
+                rows[i:i+ROI_WRITE_BATCH_SIZE]
+            )
+        cur.execute(update_sql)
+        if cleanup:
+            cur.executemany(*cleanup)
+        cnx.commit()
+    except Exception:
+        cnx.rollback()
+        raise
+    finally:
+        cur.execute(f"DROP TEMPORARY TABLE IF EXISTS {table}")
+        cur.close()
+
+def write_trade_rois(cnx, rows, cleanup=None):
+    """Apply (id, min_roi, max_roi, avg_roi) rows with one joined UPDATE."""
+    _update_from_temp_table(
+        cnx, "tmp_trade_roi",
+        "id INT PRIMARY KEY, min_roi DECIMAL(10,2), "
+        "max_roi DECIMAL(10,2), avg_roi DECIMAL(10,2)",
+        rows,
+        "UPDATE politician_trades AS p JOIN tmp_trade_roi AS r ON r.id = p.id "
+        "SET p.min_roi = r.min_roi, p.max_roi = r.max_roi, p.avg_roi = r.avg_roi",
+        cleanup
+    )
+
+def write_pair_rois(cnx, rows, cleanup=None):
+    """Apply (ticker, avg_roi, min_roi, max_roi) rows to every trade of each ticker."""
+    _update_from_temp_table(
+        cnx, "tmp_ticker_roi",
+        "ticker VARCHAR(100) PRIMARY KEY, avg_roi DECIMAL(10,2), "
+        "min_roi DECIMAL(10,2), max_roi DECIMAL(10,2)",
+        rows,
+        "UPDATE politician_trades AS p JOIN tmp_ticker_roi AS r ON p.ticker = r.ticker "
+        "SET p.avg_roi = r.avg_roi, p.min_roi = r.min_roi, p.max_roi = r.max_roi",
+        cleanup
+    )
+
+MARK_DIRTY_SQL = """
+    INSERT INTO roi_dirty_tickers (ticker) VALUES (%s)
+    ON DUPLICATE KEY UPDATE marked_at = CURRENT_TIMESTAMP(6)
+"""
+
+def _db_now(cnx):
+    cur = cnx.cursor()
+    cur.execute("SELECT CURRENT_TIMESTAMP(6)")
+    (now,) = cur.fetchone()
+    cur.close()
+    return now
+
+def clear_dirty_before(marked_before):
+    """Cleanup for a full ROI pass: drop marks older than the pass's snapshot."""
+    return ("DELETE FROM roi_dirty_tickers WHERE marked_at <= %s", [(marked_before,)])
+
+def update_roi_for_all_trades():
+    """Compute & update ROI for every trade in one set-based pass."""
+    cnx = get_db_connection()
+    try:
+        snapshot = _db_now(cnx)
+        cs = cnx.cursor(dictionary=True)
         try:
-            cursor.execute(q, vals)
-            cnx.commit()
-        except Exception as e:
-            logger.error(f"Insert error: {e}")
-            cnx.rollback()
-    cursor.close()
-    cnx.close()
+            cs.execute(
+                """
+                SELECT id, ticker, trade_dt, published_dt,
+                       min_purchase_price, max_purchase_price
+                FROM politician_trades
+                """
+            )
+            trades = pd.DataFrame(cs.fetchall(), columns=[
+                "id", "ticker", "trade_dt", "published_dt",
+                "min_purchase_price", "max_purchase_price"
+            ])
+        finally:
+            cs.close()
 
+        start = time.perf_counter()
+        rows = compute_trade_rois(trades, PriceIndex())
+        write_trade_rois(cnx, rows, clear_dirty_before(snapshot))
+        logger.info(f"Updated ROI for {len(rows)} trades in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logger.error(f"Error updating ROI: {e}")
+    finally:
+        cnx.close()
 
-def update_roi_by_pairs():
-    """Compute & update ROI based on buy–sell pairs per ticker."""
-    tickers = fetch_distinct_tickers_from_db()
-    for tk in tqdm(tickers, desc="Updating ROI by pairs"):
-        cnx = get_db_connection()
-        cur = cnx.cursor(dictionary=True)
-        cur.execute(
-            """
-            SELECT id, trade_type, trade_date, published_date
-            FROM politician_trades
-            WHERE ticker=%s
-            ORDER BY STR_TO_DATE(trade_date, %s) ASC
-            """,
-            (tk, DATE_FORMAT)
-        )
-        rows = cur.fetchall()
-        cur.close(); cnx.close()
-
-        clean = []
-        for r in rows:
-            tt = r.get('trade_type')
-            if not isinstance(tt, str):
-                logger.warning(f"Skipping id={r.get('id')} for {tk}: invalid trade_type")
-                continue
-            clean.append(r)
-
-        pairs = []
-        i = 0
-        while i < len(clean) - 1:
-            if (clean[i]['trade_type'].strip().lower() == "buy" and
-                clean[i+1]['trade_type'].strip().lower() == "sell"):
-                pairs.append((clean[i], clean[i+1]))
-                i += 2
-            else:
-                i += 1
+def compute_pair_rois(trades, index):
+    """Vectorized buy→sell pairing and ROI aggregation across all tickers.
 
-        if not pairs:
-            continue
+    Within each ticker (trades ordered by trade date, missing dates first)
+    every buy immediately followed by a sell forms a pair; its ROI is the move
+    from the buy's trade_date price to the sell's published_date price.
+    Returns (ticker, avg_roi, min_roi, max_roi) rows for tickers with at
+    least one priced pair.
+    """
+    if trades.empty:
+        return []
+    df = trades[trades["trade_type"].map(lambda v: isinstance(v, str))].copy()
+    skipped = len(trades) - len(df)
+    if skipped:
+        logger.warning(f"Skipping {skipped} trades with invalid trade_type")
 
-        rois = []
-        for buy, sell in pairs:
-            b,_ = get_historical_price(tk, buy['trade_date'])
-            s,_ = get_historical_price(tk, sell['published_date'])
-            if b and s:
-                rois.append(((s - b)/b)*100)
+    df["ticker"] = df["ticker"].astype(str).str.strip()
+    valid = {t: is_valid_ticker(t) for t in df["ticker"].unique()}
+    df = df[df["ticker"].map(valid)]
+    df["key"] = df["ticker"].str.upper()
+    df["trade_dt"] = date_column(df, "trade_dt", "trade_date")
+    df["published_dt"] = date_column(df, "published_dt", "published_date")
+    df = df.sort_values(["key", "trade_dt", "id"], na_position="first", kind="stable")
 
-        if not rois:
-            continue
+    tt = df["trade_type"].str.strip().str.lower()
+    nxt = tt.groupby(df["key"]).shift(-1)
+    sell_pub = df.groupby("key")["published_dt"].shift(-1)
+    is_pair = ((tt == "buy") & (nxt == "sell")).to_numpy()
+    if not is_pair.any():
+        return []
+
+    pairs = df[is_pair]
+    b = index.nearest_many(pairs["ticker"].tolist(), pairs["trade_dt"])
+    s = index.nearest_many(pairs["ticker"].tolist(), sell_pub[is_pair])
+    priced = ~np.isnan(b) & (b != 0) & ~np.isnan(s) & (s != 0)
 
-        avg_roi = sum(rois)/len(rois)
-        min_roi, max_roi = min(rois), max(rois)
+    rois = pd.DataFrame({
+        "key": pairs["key"].to_numpy()[priced],
+        "ticker": pairs["ticker"].to_numpy()[priced],
+        "roi": ((s - b) / np.where(b == 0, np.nan, b) * 100)[priced],
+    })
+    out = []
+    for _, g in rois.groupby("key", sort=True):
+        vals = g["roi"].tolist()
+        # plain sum()/len() so the average matches the old per-ticker loop
+        out.append((
+            g["ticker"].iat[0],
+            round(sum(vals) / len(vals), 2), round(min(vals), 2), round(max(vals), 2)
+        ))
+    return out
 
-        cnx = get_db_connection()
-        uc = cnx.cursor()
+def update_roi_by_pairs():
+    """Compute & update ROI based on buy–sell pairs per ticker in one pass."""
+    cnx = get_db_connection()
+    try:
+        snapshot = _db_now(cnx)
+        cs = cnx.cursor(dictionary=True)
         try:
-            uc.execute(
-                "UPDATE politician_trades SET avg_roi=%s, min_roi=%s, max_roi=%s WHERE ticker=%s",
-                (round(avg_roi,2), round(min_roi,2), round(max_roi,2), tk)
+            cs.execute(
+                """
+                SELECT id, ticker, trade_type, trade_dt, published_dt
+                FROM politician_trades
+                WHERE ticker IS NOT NULL AND ticker <> 'N/A'
+                """
             )
-            cnx.commit()
-        except Exception as e:
-            logger.error(f"Error updating ROI for {tk}: {e}")
-            cnx.rollback()
+            trades = pd.DataFrame(cs.fetchall(), columns=[
+                "id", "ticker", "trade_type", "trade_dt", "published_dt"
+            ])
         finally:
-            uc.close(); cnx.close()
+            cs.close()
 
-def update_roi_for_all_trades():
-    """Compute & update ROI for each row individually with progress bar."""
+        start = time.perf_counter()
+        rows = compute_pair_rois(trades, PriceIndex())
+        write_pair_rois(cnx, rows, clear_dirty_before(snapshot))
+        logger.info(f"Updated pair ROI for {len(rows)} tickers in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logger.error(f"Error updating ROI by pairs: {e}")
+    finally:
+        cnx.close()
+
+def update_roi_dirty(by_pairs=True, chunk_size=500):
+    """Recompute ROI only for tickers in roi_dirty_tickers.
+
+    Uses the pair method (update_roi_by_pairs) or, with by_pairs=False, the
+    per-trade one (update_roi_for_all_trades), restricted to the dirty
+    tickers. The ROI writes and the removal of the processed marks commit
+    together; a ticker re-marked while this runs stays dirty.
+    """
     cnx = get_db_connection()
-    cs = cnx.cursor(dictionary=True)
-    cu = cnx.cursor()
-    cs.execute(
-        """
-        SELECT id, ticker, trade_date, published_date,
-               min_purchase_price, max_purchase_price
-        FROM politician_trades
-        """
-    )
-    records = cs.fetchall()
-    cs.close()
+    try:
+        cs = cnx.cursor(dictionary=True)
+        try:
+            cs.execute("SELECT ticker, marked_at FROM roi_dirty_tickers")
+            dirty = cs.fetchall()
+            if not dirty:
+                logger.info("No dirty tickers; ROI is up to date.")
+                return 0
+            tickers = [d["ticker"] for d in dirty]
+            columns = ["id", "ticker", "trade_type", "trade_dt", "published_dt",
+                       "min_purchase_price", "max_purchase_price"]
+            rows = []
+            for i in range(0, len(tickers), chunk_size):
+                chunk = tickers[i:i+chunk_size]
+                marks = ",".join(["%s"] * len(chunk))
+                cs.execute(
+                    f"SELECT {', '.join(columns)} FROM politician_trades WHERE ticker IN ({marks})",
+                    tuple(chunk)
+                )
+                rows += cs.fetchall()
+        finally:
+            cs.close()
+        trades = pd.DataFrame(rows, columns=columns)
 
-    for r in tqdm(records, desc="Updating ROI per trade"):
-        worst, best, avg = calculate_roi_range(
-            r['min_purchase_price'], r['max_purchase_price'],
-            r['ticker'], r['trade_date'], r['published_date']
+        cleanup = (
+            "DELETE FROM roi_dirty_tickers WHERE ticker = %s AND marked_at <= %s",
+            [(d["ticker"], d["marked_at"]) for d in dirty]
         )
+        start = time.perf_counter()
+        if by_pairs:
+            out = compute_pair_rois(trades, PriceIndex())
+            write_pair_rois(cnx, out, cleanup)
+        else:
+            out = compute_trade_rois(trades, PriceIndex())
+            write_trade_rois(cnx, out, cleanup)
+        logger.info(f"Recomputed ROI for {len(dirty)} dirty tickers ({len(trades)} trades) "
+                    f"in {time.perf_counter() - start:.2f}s")
+        return len(dirty)
+    except Exception as e:
+        logger.error(f"Error updating dirty ROI: {e}")
+        return 0
+    finally:
+        cnx.close()
+
+DATE_BACKFILL_BATCH_SIZE = 5000
+
+def backfill_trade_dates(batch_size=DATE_BACKFILL_BATCH_SIZE):
+    """Fill trade_dt/published_dt from the text columns, one id range at a time."""
+    cnx = get_db_connection()
+    last_id, total = 0, 0
+    try:
+        cs = cnx.cursor()
+        while True:
+            cs.execute(
+                "SELECT id, trade_date, published_date FROM politician_trades "
+                "WHERE id > %s AND (trade_dt IS NULL OR published_dt IS NULL) "
+                "ORDER BY id LIMIT %s",
+                (last_id, batch_size)
+            )
+            batch = cs.fetchall()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            rows = [
+                (i, _as_date(safe_parse_date(td)), _as_date(safe_parse_date(pub)))
+                for i, td, pub in batch
+            ]
+            _update_from_temp_table(
+                cnx, "tmp_trade_dates",
+                "id INT PRIMARY KEY, trade_dt DATE, published_dt DATE",
+                rows,
+                "UPDATE politician_trades AS p JOIN tmp_trade_dates AS d ON d.id = p.id "
+                "SET p.trade_dt = d.trade_dt, p.published_dt = d.published_dt"
+            )
+            total += len(rows)
+            logger.info(f"Backfilled dates for {total} trades (through id {last_id})")
+        cs.close()
+    finally:
+        cnx.close()
+    return total
+
+DEDUP_BATCH_SIZE = 1000
+
+def dedupe_trades(batch_size=DEDUP_BATCH_SIZE):
+    """Delete duplicate trades, keeping the lowest id of each natural key.
+
+    One-off cleanup before iteration12.sql makes trade_hash unique. Works
+    through duplicated keys batch_size at a time, one transaction per batch.
+    """
+    cnx = get_db_connection()
+    deleted = 0
+    try:
+        cs = cnx.cursor()
         try:
-            cu.execute(
-                "UPDATE politician_trades SET min_roi=%s, max_roi=%s, avg_roi=%s WHERE id=%s",
-                (worst, best, avg, r['id'])
+            cs.execute(
+                "SELECT trade_hash, MIN(id), COUNT(*) FROM politician_trades "
+                "GROUP BY trade_hash HAVING COUNT(*) > 1"
             )
-            cnx.commit()
-        except Exception as e:
-            logger.error(f"Error updating ROI id {r['id']}: {e}")
-            cnx.rollback()
+            dupes = cs.fetchall()
+        finally:
+            cs.close()
+
+        extra = sum(n - 1 for _, _, n in dupes)
+        logger.info(f"Found {len(dupes)} duplicated trades ({extra} extra rows)")
+        for i in range(0, len(dupes), batch_size):
+            batch = [(h, keep) for h, keep, _ in dupes[i:i+batch_size]]
+            _update_from_temp_table(
+                cnx, "tmp_trade_dupes",
+                "trade_hash BINARY(16) PRIMARY KEY, keep_id INT",
+                batch,
+                "DELETE p FROM politician_trades AS p JOIN tmp_trade_dupes AS d "
+                "ON p.trade_hash = d.trade_hash AND p.id <> d.keep_id"
+            )
+            deleted += sum(n - 1 for _, _, n in dupes[i:i+batch_size])
+            logger.info(f"Deleted {deleted}/{extra} duplicate trades")
+    finally:
+        cnx.close()
+    return deleted
 
-    cu.close()
-    cnx.close()
+HISTORY_START = datetime(2016, 1, 1)
+SYMBOL_CHUNK_SIZE = 50
 
-def populate_historical_trades():
-    """Fetch distinct tickers, pull bars from Alpaca, insert into historical_trades."""
+BAR_COLUMNS = ["symbol", "timestamp", "open", "high", "low", "close",
+               "volume", "trade_count", "vwap"]
+
+INSERT_BAR_SQL = """
+    INSERT INTO historical_trades
+      (symbol, timestamp, open, high, low, close, volume, trade_count, vwap)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+    ON DUPLICATE KEY UPDATE
+      open=VALUES(open), high=VALUES(high), low=VALUES(low), close=VALUES(close),
+      volume=VALUES(volume), trade_count=VALUES(trade_count), vwap=VALUES(vwap)
+"""
+
+LOAD_BAR_SQL = (
+    "LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE historical_trades "
+    "FIELDS TERMINATED BY ',' LINES TERMINATED BY '\\n' "
+    f"({', '.join(BAR_COLUMNS)})"
+)
+
+def get_alpaca_client():
+    """Build a StockHistoricalDataClient from the environment."""
     API_KEY    = os.getenv("APCA_API_KEY")    or "PK3JXYAJVNEAWAJ1X3I6"
     API_SECRET = os.getenv("APCA_API_SECRET") or "TjNn9ltUdOaw80zerWy4lhpCZRa9qwAhNb8ItR3g"
     if not API_KEY or not API_SECRET:
         raise ValueError("Missing Alpaca credentials in .env")
-    client = StockHistoricalDataClient(API_KEY, API_SECRET)
-
-    raw_tickers = fetch_distinct_tickers_from_db()
-    # drop any crypto/$ tickers and empty strings
-    clean = [
-        adjust_ticker_for_alpaca(t).lstrip("$")
-        for t in raw_tickers
-        if t and not t.startswith("$")
-    ]
-    if not clean:
-        logger.info("No valid stock tickers to fetch.")
-        return
+    return StockHistoricalDataClient(API_KEY, API_SECRET)
 
-    symbols = sorted(clean)
+def fetch_alpaca_symbols():
+    """Distinct DB tickers grouped by Alpaca symbol, crypto/$ tickers dropped.
 
-    logger.info(f"Fetching historical data for: {symbols}")
+    Returns {symbol: [db tickers]} ordered by symbol.
+    """
+    by_symbol = {}
+    for t in fetch_distinct_tickers_from_db():
+        if t and not t.startswith("$"):
+            by_symbol.setdefault(adjust_ticker_for_alpaca(t).lstrip("$"), []).append(t)
+    return dict(sorted(by_symbol.items()))
 
-    req = StockBarsRequest(
-        symbol_or_symbols=symbols,
-        timeframe=TimeFrame.Day,
-        start=datetime(2016,1,1),
-        end=datetime.now()
-    )
-    bars = client.get_stock_bars(req).df
+def fetch_last_bar_timestamps():
+    """Return {symbol: latest stored bar timestamp} from historical_trades."""
+    with get_db_connection() as cnx:
+        cur = cnx.cursor()
+        try:
+            cur.execute(
+                "SELECT symbol, MAX(timestamp) FROM historical_trades GROUP BY symbol"
+            )
+            return {sym: ts for sym, ts in cur.fetchall()}
+        finally:
+            cur.close()
 
-    cnx = get_db_connection()
-    cur = cnx.cursor()
-    insert_q = """
-        INSERT INTO historical_trades
-          (symbol, timestamp, open, high, low, close, volume, trade_count, vwap)
-        VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+def plan_bar_requests(symbols, last_seen, now=None):
+    """Group symbols by the start of their missing range.
+
+    New symbols get a full backfill from HISTORY_START; known symbols resume
+    just after their last stored bar. Returns {start: [symbols]} and leaves out
+    symbols whose next bar would start in the future.
+    """
+    now = now or datetime.now()
+    plan = {}
+    for sym in symbols:
+        last = last_seen.get(sym)
+        start = last + timedelta(seconds=1) if last else HISTORY_START
+        if start >= now:
+            continue
+        plan.setdefault(start, []).append(sym)
+    return plan
+
+def bars_to_frame(bars):
+    """Vectorized conversion of an Alpaca bars frame into historical_trades columns.
+
+    Timestamps are rendered as naive UTC 'YYYY-mm-dd HH:MM:SS' strings and
+    missing trade_count/vwap values become None.
     """
+    df = bars.reset_index()
+    ts = pd.to_datetime(df["timestamp"])
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    out = pd.DataFrame({
+        "symbol":      df["symbol"].astype(str),
+        "timestamp":   ts.dt.strftime("%Y-%m-%d %H:%M:%S"),
+        "open":        df["open"].astype(float),
+        "high":        df["high"].astype(float),
+        "low":         df["low"].astype(float),
+        "close":       df["close"].astype(float),
+        "volume":      df["volume"].astype("int64"),
+        "trade_count": df["trade_count"] if "trade_count" in df else None,
+        "vwap":        df["vwap"] if "vwap" in df else None,
+    }, columns=BAR_COLUMNS)
+    return out.astype(object).where(out.notna(), None)
+
+def write_bars(cnx, frame, use_load_data=False, dirty_tickers=()):
+    """Write one converted chunk of bars in a single transaction.
 
-    for idx, row in tqdm(bars.iterrows(), total=len(bars), desc="Inserting historical trades"):
-        if isinstance(idx, tuple):
-            sym, ts = idx
+    dirty_tickers are marked for the next ROI Dirty run in the same commit.
+    """
+    cur = cnx.cursor()
+    try:
+        if use_load_data:
+            with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as fh:
+                frame.to_csv(fh, index=False, header=False, na_rep="\\N", lineterminator="\n")
+            try:
+                cur.execute(LOAD_BAR_SQL, (fh.name,))
+            finally:
+                os.unlink(fh.name)
         else:
-            sym = row.get("symbol")
-            ts  = row.get("timestamp")
+            cur.executemany(INSERT_BAR_SQL, list(frame.itertuples(index=False, name=None)))
+        if dirty_tickers:
+            cur.executemany(MARK_DIRTY_SQL, [(t,) for t in dirty_tickers])
+        cnx.commit()
+        return len(frame)
+    except Exception:
+        cnx.rollback()
+        raise
+    finally:
+        cur.close()
+
+BAR_FETCH_WORKERS = 4
+# Alpaca's free data plan allows 200 requests per minute
+ALPACA_REQUESTS_PER_MINUTE = float(os.getenv("ALPACA_REQUESTS_PER_MINUTE", "200"))
+BAR_FETCH_RETRIES = 4
+BAR_RETRY_BASE_DELAY = 1.0
+BAR_RETRY_MAX_DELAY = 30.0
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+def fetch_bar_batch(client, bucket, start, chunk, end, retries=BAR_FETCH_RETRIES):
+    """Fetch one batch of daily bars, retrying with jittered exponential backoff."""
+    req = StockBarsRequest(
+        symbol_or_symbols=chunk,
+        timeframe=TimeFrame.Day,
+        start=start,
+        end=end
+    )
+    for attempt in range(retries + 1):
+        bucket.acquire()
         try:
-            cur.execute(insert_q, (
-                sym,
-                ts.strftime("%Y-%m-%d %H:%M:%S"),
-                float(row['open']), float(row['high']), float(row['low']),
-                float(row['close']), int(row['volume']),
-                row.get('trade_count'), row.get('vwap')
-            ))
-            cnx.commit()
+            return client.get_stock_bars(req).df
         except Exception as e:
-            logger.error(f"Error inserting {sym}@{ts}: {e}")
-            cnx.rollback()
+            if attempt == retries:
+                raise
+            delay = min(BAR_RETRY_MAX_DELAY, BAR_RETRY_BASE_DELAY * 2 ** attempt)
+            delay *= random.uniform(0.5, 1.0)
+            logger.warning(f"Bars for {chunk[0]}..{chunk[-1]} failed ({e}); "
+                           f"retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
 
-    cur.close()
-    cnx.close()
-    logger.info("Historical trades populated successfully.")
+def fetch_bar_batches(client, batches, end, workers=BAR_FETCH_WORKERS, bucket=None,
+                      retries=BAR_FETCH_RETRIES):
+    """Fetch (start, symbols) batches concurrently; yield (symbols, bars, error) as each finishes.
+
+    At most 2 * workers batches are in flight, so a slow consumer (the DB
+    writer) bounds memory. A batch that still fails after its retries is
+    yielded with its exception instead of stopping the others.
+    """
+    bucket = bucket or TokenBucket(ALPACA_REQUESTS_PER_MINUTE / 60)
+    todo = iter(batches)
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def refill():
+            for start, chunk in todo:
+                fut = pool.submit(fetch_bar_batch, client, bucket, start, chunk, end, retries)
+                pending[fut] = chunk
+                if len(pending) >= 2 * workers:
+                    return
+
+        refill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                chunk = pending.pop(fut)
+                try:
+                    yield chunk, fut.result(), None
+                except Exception as e:
+                    yield chunk, None, e
+            refill()
+
+def populate_historical_trades(chunk_size=SYMBOL_CHUNK_SIZE, use_load_data=False,
+                               incremental=True, workers=BAR_FETCH_WORKERS, client=None):
+    """Fetch distinct tickers, pull bars from Alpaca, upsert into historical_trades.
+
+    In incremental mode only the range after each symbol's last stored bar is
+    requested; new symbols are backfilled from HISTORY_START. Symbols are
+    requested in groups of chunk_size, fetched by `workers` threads under the
+    Alpaca rate limit, and each group is written as soon as it arrives while
+    the rest are still downloading. Symbols already in the on-disk price cache
+    get the new bars appended there too.
+    """
+    client = client or get_alpaca_client()
+    tickers_by_symbol = fetch_alpaca_symbols()
+    symbols = list(tickers_by_symbol)
+    if not symbols:
+        logger.info("No valid stock tickers to fetch.")
+        return
+
+    now = datetime.now()
+    last_seen = fetch_last_bar_timestamps() if incremental else {}
+    plan = plan_bar_requests(symbols, last_seen, now)
+    batches = [
+        (start, group[i:i+chunk_size])
+        for start, group in sorted(plan.items())
+        for i in range(0, len(group), chunk_size)
+    ]
+    if not batches:
+        logger.info("Historical trades already up to date.")
+        return
+
+    logger.info(f"Fetching historical data for {sum(len(g) for g in plan.values())} "
+                f"of {len(symbols)} symbols in {len(batches)} batches")
+
+    cache = get_price_cache()
+    # only LOAD DATA needs a dedicated connection; plain inserts use the pool
+    cnx = get_db_connection(**({"allow_local_infile": True} if use_load_data else {}))
+    total = failed = 0
+    try:
+        fetched = fetch_bar_batches(client, batches, now, workers)
+        for chunk, bars, err in tqdm(fetched, total=len(batches), desc="Inserting historical trades"):
+            if err is not None:
+                failed += len(chunk)
+                logger.error(f"Giving up on bars for {chunk[0]}..{chunk[-1]}: {err}")
+                continue
+            if bars.empty:
+                continue
+            frame = bars_to_frame(bars)
+            try:
+                dirty = [t for sym in frame["symbol"].unique() for t in tickers_by_symbol.get(sym, [])]
+                total += write_bars(cnx, frame, use_load_data, dirty)
+            except Exception as e:
+                logger.error(f"Error writing bars for {chunk[0]}..{chunk[-1]}: {e}")
+                continue
+            if cache:
+                cache.update_from_frame(frame)
+    finally:
+        cnx.close()
+    if failed:
+        logger.warning(f"{failed} symbols could not be fetched; rerun to retry them.")
+    logger.info(f"Historical trades populated successfully ({total} bars).")
+
+POLITICIAN_URLS = [
+    "https://www.capitoltrades.com/politicians/K000389",
+    "https://www.capitoltrades.com/politicians/G000596",
+    "https://www.capitoltrades.com/politicians/C001123",
+    "https://www.capitoltrades.com/politicians/C001047",
+    "https://www.capitoltrades.com/politicians/M001232",
+    "https://www.capitoltrades.com/politicians/R000610",
+    "https://www.capitoltrades.com/politicians/M001243",
+    "https://www.capitoltrades.com/politicians/K000393",
+    "https://www.capitoltrades.com/politicians/L000566",
+    "https://www.capitoltrades.com/politicians/D000617",
+    "https://www.capitoltrades.com/politicians/C001103",
+    "https://www.capitoltrades.com/politicians/M001234",
+    "https://www.capitoltrades.com/politicians/F000472",
+    "https://www.capitoltrades.com/politicians/I000056",
+    "https://www.capitoltrades.com/politicians/L000560",
+    "https://www.capitoltrades.com/politicians/B001277",
+    "https://www.capitoltrades.com/politicians/B001292",
+    "https://www.capitoltrades.com/politicians/B001327",
+    "https://www.capitoltrades.com/politicians/G000581",
+    "https://www.capitoltrades.com/politicians/C001129",
+    "https://www.capitoltrades.com/politicians/M001222",
+    "https://www.capitoltrades.com/politicians/S000929",
+    "https://www.capitoltrades.com/politicians/K000389",
+    "https://www.capitoltrades.com/politicians/G000596",
+    "https://www.capitoltrades.com/politicians/C001123",
+    "https://www.capitoltrades.com/politicians/C001047",
+    "https://www.capitoltrades.com/politicians/M001232",
+    "https://www.capitoltrades.com/politicians/R000610",
+    "https://www.capitoltrades.com/politicians/M001243",
+    "https://www.capitoltrades.com/politicians/K000393",
+    "https://www.capitoltrades.com/politicians/L000566",
+    "https://www.capitoltrades.com/politicians/D000617",
+    "https://www.capitoltrades.com/politicians/C001103",
+    "https://www.capitoltrades.com/politicians/M001234",
+    "https://www.capitoltrades.com/politicians/F000472",
+    "https://www.capitoltrades.com/politicians/I000056",
+    "https://www.capitoltrades.com/politicians/L000560",
+    "https://www.capitoltrades.com/politicians/B001277",
+    "https://www.capitoltrades.com/politicians/B001292",
+    "https://www.capitoltrades.com/politicians/B001327",
+    "https://www.capitoltrades.com/politicians/G000581",
+    "https://www.capitoltrades.com/politicians/C001129",
+    "https://www.capitoltrades.com/politicians/M001222",
+    "https://www.capitoltrades.com/politicians/S000929",
+    "https://www.capitoltrades.com/politicians/B001236",
+    "https://www.capitoltrades.com/politicians/D000032",
+    "https://www.capitoltrades.com/politicians/J000310",
+    "https://www.capitoltrades.com/politicians/G000583",
+    "https://www.capitoltrades.com/politicians/M001244",
+    "https://www.capitoltrades.com/politicians/T000490",
+    "https://www.capitoltrades.com/politicians/L000601",
+    "https://www.capitoltrades.com/politicians/W000830",
+    "https://www.capitoltrades.com/politicians/R000395",
+    "https://www.capitoltrades.com/politicians/D000624",
+    "https://www.capitoltrades.com/politicians/J000309",
+    "https://www.capitoltrades.com/politicians/L000590",
+    "https://www.capitoltrades.com/politicians/F000450",
+    "https://www.capitoltrades.com/politicians/W000829",
+    "https://www.capitoltrades.com/politicians/S001229",
+    "https://www.capitoltrades.com/politicians/M001236",
+    "https://www.capitoltrades.com/politicians/M001157",
+    "https://www.capitoltrades.com/politicians/P000608",
+    "https://www.capitoltrades.com/politicians/S001201",
+    "https://www.capitoltrades.com/politicians/H001082",
+    "https://www.capitoltrades.com/politicians/G000590",
+    "https://www.capitoltrades.com/politicians/K000398",
+    "https://www.capitoltrades.com/politicians/D000399",
+    "https://www.capitoltrades.com/politicians/W000821",
+    "https://www.capitoltrades.com/politicians/M001242",
+    "https://www.capitoltrades.com/politicians/E000296"
+]
 
 def run_operation():
     """Interactive menu for scraper operations."""
     print("\n1: Full Insert   2: Update Trades   3: Fetch Historical   "
-          "4: ROI by Pairs   5: ROI Individual   q: Quit")
+          "4: ROI by Pairs   5: ROI Individual   6: Backfill Dates   7: Dedup Trades   "
+          "8: ROI Dirty Pairs   9: ROI Dirty Individual   q: Quit")
     choice = input("Enter choice: ").strip().lower()
     if choice == 'q':
         return False
     if choice in ('1','2'):
         update = choice == '2'
-        cutoff = get_max_trade_date_from_db() if update else None
-        if update and cutoff:
-            print(f"Skipping trades older than {cutoff}")
-        urls = [
-            "https://www.capitoltrades.com/politicians/K000389",
-            "https://www.capitoltrades.com/politicians/G000596",
-            "https://www.capitoltrades.com/politicians/C001123",
-            "https://www.capitoltrades.com/politicians/C001047",
-            "https://www.capitoltrades.com/politicians/M001232",
-            "https://www.capitoltrades.com/politicians/R000610",
-            "https://www.capitoltrades.com/politicians/M001243",
-            "https://www.capitoltrades.com/politicians/K000393",
-            "https://www.capitoltrades.com/politicians/L000566",
-            "https://www.capitoltrades.com/politicians/D000617",
-            "https://www.capitoltrades.com/politicians/C001103",
-            "https://www.capitoltrades.com/politicians/M001234",
-            "https://www.capitoltrades.com/politicians/F000472",
-            "https://www.capitoltrades.com/politicians/I000056",
-            "https://www.capitoltrades.com/politicians/L000560",
-            "https://www.capitoltrades.com/politicians/B001277",
-            "https://www.capitoltrades.com/politicians/B001292",
-            "https://www.capitoltrades.com/politicians/B001327",
-            "https://www.capitoltrades.com/politicians/G000581",
-            "https://www.capitoltrades.com/politicians/C001129",
-            "https://www.capitoltrades.com/politicians/M001222",
-            "https://www.capitoltrades.com/politicians/S000929",
-            "https://www.capitoltrades.com/politicians/K000389",
-            "https://www.capitoltrades.com/politicians/G000596",
-            "https://www.capitoltrades.com/politicians/C001123",
-            "https://www.capitoltrades.com/politicians/C001047",
-            "https://www.capitoltrades.com/politicians/M001232",
-            "https://www.capitoltrades.com/politicians/R000610",
-            "https://www.capitoltrades.com/politicians/M001243",
-            "https://www.capitoltrades.com/politicians/K000393",
-            "https://www.capitoltrades.com/politicians/L000566",
-            "https://www.capitoltrades.com/politicians/D000617",
-            "https://www.capitoltrades.com/politicians/C001103",
-            "https://www.capitoltrades.com/politicians/M001234",
-            "https://www.capitoltrades.com/politicians/F000472",
-            "https://www.capitoltrades.com/politicians/I000056",
-            "https://www.capitoltrades.com/politicians/L000560",
-            "https://www.capitoltrades.com/politicians/B001277",
-            "https://www.capitoltrades.com/politicians/B001292",
-            "https://www.capitoltrades.com/politicians/B001327",
-            "https://www.capitoltrades.com/politicians/G000581",
-            "https://www.capitoltrades.com/politicians/C001129",
-            "https://www.capitoltrades.com/politicians/M001222",
-            "https://www.capitoltrades.com/politicians/S000929",
-            "https://www.capitoltrades.com/politicians/B001236",
-            "https://www.capitoltrades.com/politicians/D000032",
-            "https://www.capitoltrades.com/politicians/J000310",
-            "https://www.capitoltrades.com/politicians/G000583",
-            "https://www.capitoltrades.com/politicians/M001244",
-            "https://www.capitoltrades.com/politicians/T000490",
-            "https://www.capitoltrades.com/politicians/L000601",
-            "https://www.capitoltrades.com/politicians/W000830",
-            "https://www.capitoltrades.com/politicians/R000395",
-            "https://www.capitoltrades.com/politicians/D000624",
-            "https://www.capitoltrades.com/politicians/J000309",
-            "https://www.capitoltrades.com/politicians/L000590",
-            "https://www.capitoltrades.com/politicians/F000450",
-            "https://www.capitoltrades.com/politicians/W000829",
-            "https://www.capitoltrades.com/politicians/S001229",
-            "https://www.capitoltrades.com/politicians/M001236",
-            "https://www.capitoltrades.com/politicians/M001157",
-            "https://www.capitoltrades.com/politicians/P000608",
-            "https://www.capitoltrades.com/politicians/S001201",
-            "https://www.capitoltrades.com/politicians/H001082",
-            "https://www.capitoltrades.com/politicians/G000590",
-            "https://www.capitoltrades.com/politicians/K000398",
-            "https://www.capitoltrades.com/politicians/D000399",
-            "https://www.capitoltrades.com/politicians/W000821",
-            "https://www.capitoltrades.com/politicians/M001242",
-            "https://www.capitoltrades.com/politicians/E000296"
-        ]
-        all_trades = []
-        for u in urls:
-            all_trades += scrape_politician_page(u, update_mode=update, cutoff_date=cutoff)
-        insert_trades_into_db(all_trades)
+        watermarks = ScrapeWatermarks.load() if update else ScrapeWatermarks()
+        backend = SCRAPE_UPDATE_BACKEND if update else SCRAPE_BACKEND
+        scraped = scrape_politicians(POLITICIAN_URLS, backend=backend,
+                                     watermarks=watermarks, update_mode=update)
+        failed = set()
+        insert_trades_into_db((t for trades in scraped for t in trades), failed=failed)
+        watermarks.save(failed)
+        db.invalidate_api_cache("trades", "politicians", "stats")
     elif choice == '3':
         populate_historical_trades()
     elif choice == '4':
         update_roi_by_pairs()
+        db.invalidate_api_cache("trades", "stats")
     elif choice == '5':
         update_roi_for_all_trades()
+        db.invalidate_api_cache("trades", "stats")
+    elif choice == '6':
+        backfill_trade_dates()
+        db.invalidate_api_cache("trades", "stats")
+    elif choice == '7':
+        dedupe_trades()
+        db.invalidate_api_cache("trades", "stats")
+    elif choice in ('8', '9'):
+        update_roi_dirty(by_pairs=choice == '8')
+        db.invalidate_api_cache("trades", "stats")
     else:
         print("Invalid choice.")
         return False
+    logger.info(f"DB pool: {db.pool_metrics()}")
     return True
 
 if __name__ == '__main__':
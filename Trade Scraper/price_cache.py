@@ -0,0 +1,114 @@
+import os
+import shutil
+import logging
+from datetime import datetime
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Set PRICE_CACHE_DIR to an empty string to turn the cache off.
+PRICE_CACHE_DIR = os.getenv(
+    "PRICE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "politrade", "bars")
+)
+PRICE_COLUMNS = ("open", "high", "low", "close")
+EPOCH = datetime(1970, 1, 1)
+
+
+class PriceCache:
+    """On-disk columnar copy of historical_trades, one directory per symbol.
+
+    Each symbol holds sorted float64 .npy columns: `timestamp` (seconds since
+    the epoch, naive UTC as stored in MySQL) plus one file per price column.
+    Reads are memory-mapped, so only the symbols actually looked up are
+    paged in and nothing is copied.
+    """
+
+    def __init__(self, root=PRICE_CACHE_DIR):
+        self.root = root
+
+    @staticmethod
+    def key(symbol):
+        return symbol.strip().upper() if isinstance(symbol, str) else ""
+
+    def _dir(self, symbol):
+        return os.path.join(self.root, quote(self.key(symbol), safe=""))
+
+    def _path(self, symbol, column):
+        return os.path.join(self._dir(symbol), f"{column}.npy")
+
+    def load(self, symbol, column="close"):
+        """Return memory-mapped (seconds, prices) for a cached symbol, else None."""
+        try:
+            secs = np.load(self._path(symbol, "timestamp"), mmap_mode="r")
+            prices = np.load(self._path(symbol, column), mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None
+        if len(secs) != len(prices):
+            # caught mid-update; let the caller fall back to the database
+            return None
+        return secs, prices
+
+    def write(self, symbol, secs, columns):
+        """Replace a symbol's columns; secs must be sorted and unique."""
+        path = self._dir(symbol)
+        os.makedirs(path, exist_ok=True)
+        # prices first and timestamps last, each swapped in atomically
+        for name, values in [*columns.items(), ("timestamp", secs)]:
+            tmp = os.path.join(path, f".{name}.tmp.npy")
+            np.save(tmp, np.ascontiguousarray(values, dtype=np.float64))
+            os.replace(tmp, self._path(symbol, name))
+
+    def invalidate(self, symbol):
+        shutil.rmtree(self._dir(symbol), ignore_errors=True)
+
+    def merge(self, symbol, secs, columns):
+        """Fold new bars into an already cached symbol, newer values winning.
+
+        Symbols that aren't cached yet are skipped: the cache must hold a
+        symbol's full history, so those are filled from the database on first
+        use instead.
+        """
+        cached = {c: self.load(symbol, c) for c in PRICE_COLUMNS}
+        if all(v is None for v in cached.values()):
+            return False
+        if any(v is None for v in cached.values()):
+            self.invalidate(symbol)
+            return False
+        # copy out of the maps before the files underneath are replaced
+        old_secs = np.array(cached["close"][0])
+        old = {c: np.array(v[1]) for c, v in cached.items()}
+        del cached
+
+        all_secs = np.concatenate([old_secs, secs])
+        # stable sort keeps the new bar last among equal timestamps
+        order = np.argsort(all_secs, kind="stable")
+        all_secs = all_secs[order]
+        keep = np.append(all_secs[1:] != all_secs[:-1], True)
+        merged = {
+            c: np.concatenate([old[c], columns[c]])[order][keep]
+            for c in PRICE_COLUMNS
+        }
+        self.write(symbol, all_secs[keep], merged)
+        return True
+
+    def update_from_frame(self, frame):
+        """Merge a bars_to_frame() chunk into the cached symbols it touches."""
+        if frame.empty:
+            return 0
+        secs = ((pd.to_datetime(frame["timestamp"]) - EPOCH) / pd.Timedelta(seconds=1)).to_numpy(float)
+        cols = {c: pd.to_numeric(frame[c], errors="coerce").to_numpy(float) for c in PRICE_COLUMNS}
+        updated = 0
+        for sym, pos in frame.groupby(frame["symbol"].map(self.key)).indices.items():
+            try:
+                updated += self.merge(sym, secs[pos], {c: v[pos] for c, v in cols.items()})
+            except Exception as e:
+                logger.warning(f"Dropping cached bars for {sym}: {e}")
+                self.invalidate(sym)
+        return updated
+
+
+def get_price_cache():
+    """The configured cache, or None if PRICE_CACHE_DIR is empty."""
+    return PriceCache(PRICE_CACHE_DIR) if PRICE_CACHE_DIR else None
@@ -0,0 +1,143 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response
+
+CACHE_TTL = float(os.getenv("API_CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "256"))
+# Set when several worker processes serve the API (see serve.py): invalidations
+# touch a per-scope stamp file here so every worker drops its own copies.
+CACHE_STAMP_DIR = os.getenv("API_CACHE_STAMP_DIR")
+
+
+class CacheEntry:
+    __slots__ = ("scope", "body", "mimetype", "etag", "expires", "created_ns")
+
+    def __init__(self, scope, body, mimetype, ttl, created_ns=None):
+        self.scope = scope
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.expires = time.monotonic() + ttl
+        self.created_ns = created_ns or time.time_ns()
+
+
+class ResponseCache:
+    """Size-bounded LRU of rendered response bodies with a TTL.
+
+    Entries are tagged with a scope (e.g. "trades") so a job that rewrites a
+    table can drop just the responses built from it. Each invalidation also
+    bumps a per-scope generation; a body built from rows read before an
+    invalidation is not stored if it only reaches put() afterwards.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, stamp_dir=CACHE_STAMP_DIR):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stamp_dir = stamp_dir
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def _stamp_path(self, scope):
+        return os.path.join(self.stamp_dir, f"{scope or '_all'}.stamp")
+
+    def _stale(self, entry):
+        if not self.stamp_dir:
+            return False
+        for scope in (entry.scope, None):
+            try:
+                if os.stat(self._stamp_path(scope)).st_mtime_ns >= entry.created_ns:
+                    return True
+            except FileNotFoundError:
+                pass
+        return False
+
+    def _touch(self, scopes):
+        for scope in scopes or [None]:
+            with open(self._stamp_path(scope), "a"):
+                pass
+            os.utime(self._stamp_path(scope))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic() or self._stale(entry):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def generation(self, scope):
+        """Take before building a response for scope; hand it to put()."""
+        with self._lock:
+            return (self._generations.get(None, 0), self._generations.get(scope, 0), time.time_ns())
+
+    def put(self, key, scope, body, mimetype, generation=None):
+        """Store a response body and return its entry.
+
+        If scope was invalidated since `generation` was taken, the entry is
+        returned without being stored. The generation's timestamp also dates
+        the entry, so other workers' stamp files catch the same race.
+        """
+        entry = CacheEntry(scope, body, mimetype, self.ttl, generation and generation[2])
+        with self._lock:
+            if generation and generation[:2] != (self._generations.get(None, 0),
+                                                 self._generations.get(scope, 0)):
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, scopes=None):
+        """Drop entries in the given scopes, or everything if scopes is None."""
+        if self.stamp_dir:
+            self._touch(scopes)
+        with self._lock:
+            for scope in scopes or [None]:
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+            if scopes is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+            keys = [k for k, e in self._entries.items() if e.scope in scopes]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+
+response_cache = ResponseCache()
+
+def cached(scope):
+    """Serve a GET route from response_cache, answering If-None-Match with 304."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.full_path
+            entry = response_cache.get(key)
+            if entry is None:
+                generation = response_cache.generation(scope)
+                response = make_response(view(*args, **kwargs))
+                # streamed exports are never buffered into the cache
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                entry = response_cache.put(key, scope, response.get_data(), response.mimetype,
+                                           generation)
+
+            if entry.etag in request.if_none_match:
+                response = make_response("", 304)
+            else:
+                response = make_response(entry.body)
+                response.mimetype = entry.mimetype
+            response.set_etag(entry.etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import queue
+import logging
+import threading
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+import mysql.connector
+
+logger = logging.getLogger(__name__)
+
+# Shared by the Flask API, the trade scraper and the NN trainer.
+db_config = {
+    'host': os.getenv("DB_HOST", "localhost"),
+    'user': os.getenv("DB_USER", "root"),
+    'password': os.getenv("DB_PASSWORD", "root"),
+    'database': os.getenv("DB_NAME", "trades_db")
+}
+
+API_URL = os.getenv("API_URL", "http://localhost:5000")
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# idle connections older than this are pinged before being handed out
+HEALTH_CHECK_INTERVAL = float(os.getenv("DB_HEALTH_CHECK_INTERVAL", "30"))
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within the pool timeout."""
+
+
+def summary_ms(samples, quantiles=(0.50, 0.99)):
+    """Percentiles and max of durations in seconds, reported in milliseconds.
+
+    Shared by the pool, password hasher, scraper and load test metrics.
+    """
+    keys = [f"p{round(q * 100)}" for q in quantiles] + ["max"]
+    if not samples:
+        return dict.fromkeys(keys, 0.0)
+    xs = sorted(samples)
+    values = [xs[min(len(xs) - 1, int(q * len(xs)))] for q in quantiles] + [xs[-1]]
+    return {k: round(v * 1000, 3) for k, v in zip(keys, values)}
+
+
+class PoolMetrics:
+    """Counters plus a rolling window of wait and checkout durations."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.discarded = 0
+        self._waits = deque(maxlen=window)
+        self._holds = deque(maxlen=window)
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self._waits.append(seconds)
+
+    def record_hold(self, seconds):
+        with self._lock:
+            self._holds.append(seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_discard(self):
+        with self._lock:
+            self.discarded += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "discarded": self.discarded,
+                "wait_ms": summary_ms(self._waits),
+                "checkout_ms": summary_ms(self._holds),
+            }
+
+
+class PooledConnection:
+    """A checked-out connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+        self._start = time.perf_counter()
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def close(self):
+        if self._cnx is not None:
+            self._pool._release(self._cnx, time.perf_counter() - self._start)
+            self._cnx = None
+
+    def __del__(self):
+        # Safety net for a checkout that is dropped without close(): free the
+        # slot so leaks can't starve the pool into PoolTimeout. The connection
+        # may be mid-result, so it is discarded rather than reused.
+        cnx = self.__dict__.get("_cnx")
+        if cnx is not None:
+            self._cnx = None
+            logger.warning("Reclaiming a pooled DB connection that was never closed")
+            self._pool._reclaim(cnx)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """Bounded MySQL connection pool with health checks and usage metrics.
+
+    At most `size` connections are checked out at once; further callers wait
+    up to `timeout` seconds and then get PoolTimeout. Connections are opened
+    lazily and reused most-recently-returned first.
+    """
+
+    def __init__(self, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 health_check_interval=HEALTH_CHECK_INTERVAL, **config):
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.config = config or db_config
+        self.metrics = PoolMetrics()
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = queue.LifoQueue()
+
+    def _healthy(self, cnx, idle_since):
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            cnx.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding stale DB connection: {e}")
+            return False
+
+    def _discard(self, cnx):
+        self.metrics.record_discard()
+        try:
+            cnx.close()
+        except Exception:
+            pass
+
+    def _checkout(self):
+        while True:
+            try:
+                cnx, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return mysql.connector.connect(**self.config)
+            if self._healthy(cnx, idle_since):
+                return cnx
+            self._discard(cnx)
+
+    def acquire(self):
+        """Check out a connection, waiting up to the pool timeout for a slot."""
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            self.metrics.record_timeout()
+            raise PoolTimeout(f"No DB connection free after {self.timeout}s")
+        self.metrics.record_wait(time.perf_counter() - start)
+        try:
+            return PooledConnection(self, self._checkout())
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, cnx, held):
+        self.metrics.record_hold(held)
+        try:
+            if cnx.in_transaction:
+                cnx.rollback()
+            self._idle.put((cnx, time.monotonic()))
+        except Exception:
+            self._discard(cnx)
+        finally:
+            self._slots.release()
+
+    def _reclaim(self, cnx):
+        try:
+            self._discard(cnx)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context-managed checkout: `with pool.connection() as cnx: ...`."""
+        cnx = self.acquire()
+        try:
+            yield cnx
+        finally:
+            cnx.close()
+
+    def close_all(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                cnx, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                cnx.close()
+            except Exception:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Return the process-wide pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+def connection():
+    """Context-managed checkout from the shared pool."""
+    return get_pool().connection()
+
+def get_db_connection(**overrides):
+    """Return a pooled connection (close() returns it to the pool).
+
+    Passing connection overrides opens a dedicated, unpooled connection.
+    """
+    if overrides:
+        return mysql.connector.connect(**{**db_config, **overrides})
+    return get_pool().acquire()
+
+def pool_metrics():
+    """Snapshot of the shared pool's wait and checkout metrics."""
+    return get_pool().metrics.snapshot()
+
+def invalidate_api_cache(*scopes):
+    """Tell a running API to drop cached responses for the given scopes.
+
+    Called by the scraper, ROI and training jobs after they commit writes.
+    Best effort: if the API isn't running there is nothing cached to drop.
+    """
+    body = json.dumps({"scopes": list(scopes) or None}).encode()
+    req = urllib.request.Request(
+        f"{API_URL}/cache/invalidate", data=body, method="POST",
+        headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=2):
+            pass
+    except Exception as e:
+        logger.info(f"API cache not invalidated ({e})")
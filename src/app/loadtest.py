@@ -0,0 +1,191 @@
+"""Local load test for the API's read routes.
+
+Seed a throwaway database (built from the SQLIterations migrations), serve
+the API against it, then drive it:
+
+    python loadtest.py seed --database trades_loadtest --trades 200000
+    DB_NAME=trades_loadtest python serve.py
+    python loadtest.py run --url http://127.0.0.1:5000 --concurrency 16 --duration 30
+
+`run` reports requests/second and p50/p99 latency for /Politicians and
+/Trades. Pass --bust-cache to defeat the response cache and measure the
+database path.
+"""
+import os
+import re
+import time
+import random
+import argparse
+import threading
+import urllib.request
+from datetime import date, timedelta
+from db import db_config, get_db_connection, summary_ms
+
+# The seeded database gets the real schema: every migration from
+# iteration4.sql on, as in the README's setup steps, with their triggers.
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "SQLIterations")
+FIRST_MIGRATION = 4
+
+
+def migration_files(directory=MIGRATIONS_DIR, first=FIRST_MIGRATION):
+    """iterationN.sql files from `first` on, in numeric order."""
+    found = []
+    for name in os.listdir(directory):
+        m = re.fullmatch(r"iteration(\d+)\.sql", name)
+        if m and int(m.group(1)) >= first:
+            found.append((int(m.group(1)), os.path.join(directory, name)))
+    return [path for _, path in sorted(found)]
+
+
+def split_sql(text):
+    """Split a migration into statements, honouring DELIMITER blocks."""
+    statements, current, delimiter = [], [], ";"
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if not current and (not stripped or stripped.startswith("--")):
+            continue
+        if stripped.endswith(delimiter) and not stripped.startswith("--"):
+            current.append(line.rstrip()[:-len(delimiter)])
+            statements.append("\n".join(current).strip())
+            current = []
+        else:
+            current.append(line)
+    if "\n".join(current).strip():
+        raise ValueError(f"Unterminated statement: {current[0].strip()}...")
+    return statements
+
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "JPM", "XOM", "BRK/B"]
+
+
+def seed(database, politicians, trades, batch=5000, force=False):
+    if not re.fullmatch(r"\w+", database):
+        raise SystemExit(f"Refusing to seed {database!r}: use letters, digits and underscores")
+    if database == db_config["database"] and not force:
+        raise SystemExit(f"Refusing to drop {database}, the configured DB_NAME; "
+                         "pick another --database or pass --force")
+    cnx = get_db_connection(database=None)
+    cur = cnx.cursor()
+    cur.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cur.execute(f"CREATE DATABASE `{database}`")
+    cur.execute(f"USE `{database}`")
+    for path in migration_files():
+        with open(path, encoding="utf-8") as f:
+            for statement in split_sql(f.read()):
+                cur.execute(statement)
+        cnx.commit()
+
+    names = [f"Politician {i:03d}" for i in range(politicians)]
+    cur.executemany(
+        "INSERT INTO politicians (name, party, chamber, state) VALUES (%s,%s,%s,%s)",
+        [(n, random.choice(["Democrat", "Republican"]), random.choice(["House", "Senate"]), "Ohio")
+         for n in names]
+    )
+    cur.executemany(
+        "INSERT INTO politician_confidence (politician, confidence_score) VALUES (%s,%s)",
+        [(n, random.random()) for n in names]
+    )
+    cnx.commit()
+
+    start = date(2016, 1, 1)
+    rows, seen = [], set()
+    for i in range(trades):
+        # uq_trade_hash (iteration12.sql) rejects repeats of the natural key
+        while True:
+            pid = random.randrange(politicians)
+            ticker, trade_type = random.choice(TICKERS), random.choice(["buy", "sell"])
+            td = start + timedelta(days=random.randrange(3000))
+            pd_ = td + timedelta(days=random.randrange(45))
+            if (pid, ticker, trade_type, td, pd_) not in seen:
+                seen.add((pid, ticker, trade_type, td, pd_))
+                break
+        rows.append((
+            names[pid], pid + 1, "Issuer Inc", ticker,
+            pd_.strftime("%d %b %Y"), pd_, td.strftime("%d %b %Y"), td,
+            str((pd_ - td).days), trade_type, 1,
+            1000, 15000, random.uniform(-50, 50)
+        ))
+        if len(rows) >= batch or i == trades - 1:
+            cur.executemany(
+                "INSERT INTO politician_trades (politician, politician_id, traded_issuer, ticker, "
+                "published_date, published_dt, trade_date, trade_dt, gap, trade_type, page, "
+                "min_purchase_price, max_purchase_price, avg_roi) "
+                "VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)",
+                rows
+            )
+            cnx.commit()
+            rows = []
+    cur.close()
+    cnx.close()
+    print(f"Seeded {database}: {politicians} politicians, {trades} trades")
+
+
+def run(url, concurrency, duration, politicians, bust_cache):
+    targets = {
+        "/Politicians": lambda: "/Politicians",
+        "/Trades": lambda: f"/Trades?politician=Politician%20{random.randrange(politicians):03d}&limit=100",
+    }
+    for name, make_path in targets.items():
+        latencies, errors = [], 0
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def worker():
+            nonlocal errors
+            n = 0
+            while time.perf_counter() < deadline:
+                path = make_path()
+                if bust_cache:
+                    n += 1
+                    path += ("&" if "?" in path else "?") + f"_={threading.get_ident()}-{n}"
+                t0 = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(url + path, timeout=30) as resp:
+                        resp.read()
+                    ok = True
+                except Exception:
+                    ok = False
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    if ok:
+                        latencies.append(elapsed)
+                    else:
+                        errors += 1
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - started
+
+        ms = summary_ms(latencies)
+        print(f"{name:14s} {len(latencies) / wall:8.1f} req/s   p50 {ms['p50']:7.1f} ms   "
+              f"p99 {ms['p99']:7.1f} ms   errors {errors}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    s = sub.add_parser("seed")
+    s.add_argument("--database", default="trades_loadtest")
+    s.add_argument("--politicians", type=int, default=100)
+    s.add_argument("--trades", type=int, default=200000)
+    s.add_argument("--force", action="store_true",
+                   help="allow seeding (dropping) the database named by DB_NAME")
+    r = sub.add_parser("run")
+    r.add_argument("--url", default="http://127.0.0.1:5000")
+    r.add_argument("--concurrency", type=int, default=16)
+    r.add_argument("--duration", type=float, default=30)
+    r.add_argument("--politicians", type=int, default=100)
+    r.add_argument("--bust-cache", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        seed(args.database, args.politicians, args.trades, force=args.force)
+    else:
+        run(args.url, args.concurrency, args.duration, args.politicians, args.bust_cache)
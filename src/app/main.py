@@ -1,52 +1,101 @@
-from flask import Flask, jsonify, request, make_response
+from flask import Flask, Response, jsonify, request, make_response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from dotenv import load_dotenv
 from auth import create_access_token, decode_access_token
-import mysql.connector
+from db import connection, pool_metrics
+from cache import cached, response_cache
+from passwords import hasher, HasherOverloaded, HasherTimeout
+from datetime import date, time, timedelta
+import base64
+import json
 import logging
-import bcrypt
 
 load_dotenv()
 
+def json_default(o):
+    """Shared JSON encoding for DB values: ISO dates/times, TIME columns as H:MM:SS."""
+    if isinstance(o, (date, time)):
+        return o.isoformat()
+    if isinstance(o, timedelta):
+        return str(o)
+    return DefaultJSONProvider.default(o)
+
+class ApiJSONProvider(DefaultJSONProvider):
+    default = staticmethod(json_default)
+
 app = Flask(__name__)
-CORS(app, supports_credentials=True, origins=["http://localhost:3000"])
+app.json = ApiJSONProvider(app)
+CORS(app, supports_credentials=True, origins=["http://localhost:3000"], expose_headers=["ETag"])
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-db_config = {
-    'host': 'localhost',
-    'user': 'root',  # Replace with your MySQL username
-    'password': 'root',  # Replace with your MySQL password
-    'database': 'trades_db'
-}
-
-def get_db_connection():
-    try:
-        logger.info("Attempting to connect to MySQL database...")
-        conn = mysql.connector.connect(**db_config)
-        logger.info("Successfully connected to MySQL database")
-        return conn
-    except mysql.connector.Error as err:
-        logger.error(f"Database connection error: {err}")
-        raise
-
 def fetch_all_from_table(table_name):
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        logger.info(f"Executing query: SELECT * FROM {table_name}")
-        cursor.execute(f"SELECT * FROM {table_name}")
-        results = cursor.fetchall()
-        logger.info(f"Retrieved {len(results)} records from {table_name}")
-        cursor.close()
-        conn.close()
+        with connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            logger.info(f"Executing query: SELECT * FROM {table_name}")
+            cursor.execute(f"SELECT * FROM {table_name}")
+            results = cursor.fetchall()
+            logger.info(f"Retrieved {len(results)} records from {table_name}")
+            cursor.close()
         return results
     except Exception as e:
         logger.error(f"Error fetching data from {table_name}: {e}")
         raise
 
+STREAM_FORMATS = ('json', 'ndjson')
+STREAM_CHUNK_SIZE = 500
+
+def stream_query(sql, fmt, params=()):
+    """Stream a query's rows as a JSON array or NDJSON.
+
+    Rows are read off an unbuffered cursor STREAM_CHUNK_SIZE at a time and
+    encoded as they go, so memory stays flat however large the table is.
+    """
+    def generate():
+        with connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(sql, params)
+                if fmt == 'json':
+                    yield '['
+                first = True
+                while True:
+                    rows = cursor.fetchmany(STREAM_CHUNK_SIZE)
+                    if not rows:
+                        break
+                    parts = [app.json.dumps(row, separators=(",", ":")) for row in rows]
+                    if fmt == 'ndjson':
+                        yield "\n".join(parts) + "\n"
+                    else:
+                        yield ("" if first else ",") + ",".join(parts)
+                    first = False
+                if fmt == 'json':
+                    yield ']'
+            except Exception as e:
+                logger.error(f"Error streaming {sql!r}: {e}")
+                raise
+            finally:
+                cursor.close()
+
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+def table_response(table_name):
+    """SELECT * from a table, streamed when ?stream=json|ndjson is given."""
+    fmt = request.args.get('stream')
+    if fmt in STREAM_FORMATS:
+        logger.info(f"Streaming {table_name} as {fmt}")
+        return stream_query(f"SELECT * FROM {table_name}", fmt)
+    try:
+        return jsonify(fetch_all_from_table(table_name))
+    except Exception as e:
+        logger.error(f"Error in /{table_name} endpoint: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/')
 def index():
     logger.info("Root endpoint accessed")
@@ -58,136 +107,210 @@ def index():
             '/StockMarketData',
             '/API_Requests',
             '/Trades',
-            '/Confidence'
+            '/Confidence',
+            '/PoliticianStats',
+            '/metrics/db-pool',
+            '/metrics/password-hash'
         ]
     })
 
 @app.route('/test-db-connection')
 def test_db_connection():
     try:
-        conn = get_db_connection()
-        conn.close()
+        with connection() as conn:
+            conn.ping()
         return jsonify({"status": "success", "message": "Database connection successful"})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route('/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    # only the local scraper / ROI / training jobs may flush the cache
+    if request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({"error": "Forbidden"}), 403
+    scopes = (request.get_json(silent=True) or {}).get('scopes')
+    dropped = response_cache.invalidate(set(scopes) if scopes else None)
+    logger.info(f"Cache invalidated for {scopes or 'all scopes'}: {dropped} entries dropped")
+    return jsonify({"dropped": dropped})
+
+@app.route('/metrics/db-pool')
+def db_pool_metrics():
+    return jsonify(pool_metrics())
+
+@app.route('/metrics/password-hash')
+def password_hash_metrics():
+    return jsonify(hasher.metrics.snapshot())
+
+@app.errorhandler(HasherOverloaded)
+def hasher_overloaded(e):
+    logger.warning(f"Refusing auth request: {e}")
+    response = jsonify({"error": "Too many login attempts in progress, try again shortly"})
+    response.headers["Retry-After"] = "1"
+    return response, 429
+
+@app.errorhandler(HasherTimeout)
+def hasher_timeout(e):
+    logger.warning(f"Auth request timed out: {e}")
+    response = jsonify({"error": "Service busy, try again shortly"})
+    response.headers["Retry-After"] = "5"
+    return response, 503
+
 @app.route('/Users')
 def get_users():
-    try:
-        return jsonify(fetch_all_from_table('Users'))
-    except Exception as e:
-        logger.error(f"Error in /Users endpoint: {e}")
-        return jsonify({"error": str(e)}), 500
+    return table_response('Users')
 
 @app.route('/Politicians')
+@cached('politicians')
 def get_politicians():
-    conn   = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute("""
-      SELECT DISTINCT
-        p.politician,
-        p.party,
-        p.chamber,
-        p.state,
-        p.image,
-        c.confidence_score
-      FROM politician_trades AS p
-      LEFT JOIN politician_confidence AS c
-        ON p.politician = c.politician
-    """)
-    politicians = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
+    with connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+
+        cursor.execute("""
+          SELECT
+            p.name AS politician,
+            p.party,
+            p.chamber,
+            p.state,
+            p.image,
+            c.confidence_score
+          FROM politicians AS p
+          LEFT JOIN politician_confidence AS c
+            ON p.name = c.politician
+        """)
+        politicians = cursor.fetchall()
+
+        cursor.close()
     return jsonify({ "trades": politicians })
 
 
-@app.route('/StockMarketData')
-def get_stock_market_data():
+@app.route('/PoliticianStats')
+@cached('stats')
+def get_politician_stats():
+    """Per-politician trade aggregates, optionally filtered by ?politician=."""
+    sql = """
+      SELECT politician_id, politician, trade_count, avg_roi, std_roi, profit_rate,
+             avg_hold, roi_missing_rate
+      FROM politician_features
+    """
+    params = []
+    if request.args.get('politician'):
+        sql += " WHERE politician = %s"
+        params.append(request.args['politician'])
+    sql += " ORDER BY politician"
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM StockMarketData")
-        results = cursor.fetchall()
-        
-        # Convert TIME objects to strings for JSON serialization
-        for row in results:
-            if 'Open' in row and hasattr(row['Open'], 'isoformat'):
-                row['Open'] = row['Open'].isoformat()
-            if 'Close' in row and hasattr(row['Close'], 'isoformat'):
-                row['Close'] = row['Close'].isoformat()
-            if 'Date' in row and hasattr(row['Date'], 'isoformat'):
-                row['Date'] = row['Date'].isoformat()
-        
-        cursor.close()
-        conn.close()
-        return jsonify(results)
+        with connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            stats = cursor.fetchall()
+            cursor.close()
+        return jsonify({"stats": stats})
     except Exception as e:
-        logger.error(f"Error in /StockMarketData endpoint: {e}")
+        logger.error(f"Error in /PoliticianStats endpoint: {e}")
         return jsonify({"error": str(e)}), 500
 
+
+@app.route('/StockMarketData')
+@cached('stock')
+def get_stock_market_data():
+    return table_response('StockMarketData')
+
 @app.route('/API_Requests')
 def get_api_requests():
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM API_Requests")
-        results = cursor.fetchall()
-        
-        # Convert TIME objects to strings for JSON serialization
-        for row in results:
-            if 'RequestTime' in row and hasattr(row['RequestTime'], 'isoformat'):
-                row['RequestTime'] = row['RequestTime'].isoformat()
-        
-        cursor.close()
-        conn.close()
-        return jsonify(results)
-    except Exception as e:
-        logger.error(f"Error in /API_Requests endpoint: {e}")
-        return jsonify({"error": str(e)}), 500
+    return table_response('API_Requests')
+
+TRADE_COLUMNS = """
+    id, politician, party, chamber, state, image, traded_issuer, ticker,
+    trade_type, min_purchase_price, max_purchase_price, trade_date, trade_dt,
+    published_date, published_dt, gap, min_roi, max_roi, avg_roi
+"""
+TRADES_DEFAULT_LIMIT = 100
+TRADES_MAX_LIMIT = 500
+
+def encode_cursor(trade_dt, trade_id):
+    raw = json.dumps([trade_dt.isoformat() if trade_dt else None, trade_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    trade_dt, trade_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return (date.fromisoformat(trade_dt) if trade_dt else None), int(trade_id)
+
+def build_trades_query(args):
+    """Turn /Trades query args into (sql, params, limit).
+
+    Filters: politician, ticker, start/end (trade date, inclusive).
+    Sort: date_desc (default) or date_asc, keyset-paginated on (trade_dt, id)
+    with missing dates last when descending and first when ascending.
+    """
+    where, params = [], []
+    if args.get('politician'):
+        where.append("politician = %s"); params.append(args['politician'])
+    if args.get('ticker'):
+        where.append("ticker = %s"); params.append(args['ticker'])
+    if args.get('start'):
+        where.append("trade_dt >= %s"); params.append(date.fromisoformat(args['start']))
+    if args.get('end'):
+        where.append("trade_dt <= %s"); params.append(date.fromisoformat(args['end']))
+
+    sort = args.get('sort', 'date_desc')
+    if sort not in ('date_desc', 'date_asc'):
+        raise ValueError(f"Unsupported sort: {sort}")
+    desc = sort == 'date_desc'
+
+    if args.get('cursor'):
+        last_dt, last_id = decode_cursor(args['cursor'])
+        if desc and last_dt is not None:
+            where.append("(trade_dt < %s OR (trade_dt = %s AND id < %s) OR trade_dt IS NULL)")
+            params += [last_dt, last_dt, last_id]
+        elif desc:
+            where.append("(trade_dt IS NULL AND id < %s)"); params.append(last_id)
+        elif last_dt is not None:
+            where.append("(trade_dt > %s OR (trade_dt = %s AND id > %s))")
+            params += [last_dt, last_dt, last_id]
+        else:
+            where.append("((trade_dt IS NULL AND id > %s) OR trade_dt IS NOT NULL)")
+            params.append(last_id)
+
+    limit = min(int(args.get('limit', TRADES_DEFAULT_LIMIT)), TRADES_MAX_LIMIT)
+    if limit < 1:
+        raise ValueError("limit must be positive")
+
+    order = "trade_dt DESC, id DESC" if desc else "trade_dt ASC, id ASC"
+    sql = f"SELECT {TRADE_COLUMNS} FROM politician_trades"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {order} LIMIT %s"
+    # one extra row tells us whether another page exists
+    return sql, params + [limit + 1], limit
 
 @app.route('/Trades')
+@cached('trades')
 def get_trades():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM Trades")
-        results = cursor.fetchall()
-        
-        # Convert DATE objects to strings for JSON serialization
-        for row in results:
-            if 'TradeDate' in row and hasattr(row['TradeDate'], 'isoformat'):
-                row['TradeDate'] = row['TradeDate'].isoformat()
-            if 'Date' in row and hasattr(row['Date'], 'isoformat'):
-                row['Date'] = row['Date'].isoformat()
-        
-        cursor.close()
-        conn.close()
-        return jsonify(results)
+        sql, params, limit = build_trades_query(request.args)
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid query parameters: {e}"}), 400
+
+    try:
+        with connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            results = cursor.fetchall()
+            cursor.close()
+
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = encode_cursor(results[-1]['trade_dt'], results[-1]['id'])
+
+        return jsonify({"trades": results, "next_cursor": next_cursor})
     except Exception as e:
         logger.error(f"Error in /Trades endpoint: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/Confidence')
+@cached('confidence')
 def get_confidence():
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM Confidence")
-        results = cursor.fetchall()
-        
-        # Convert TIME objects to strings for JSON serialization
-        for row in results:
-            if 'TimeStamp' in row and hasattr(row['TimeStamp'], 'isoformat'):
-                row['TimeStamp'] = row['TimeStamp'].isoformat()
-        
-        cursor.close()
-        conn.close()
-        return jsonify(results)
-    except Exception as e:
-        logger.error(f"Error in /Confidence endpoint: {e}")
-        return jsonify({"error": str(e)}), 500
+    return table_response('Confidence')
 
 
 
@@ -228,27 +351,27 @@ def register():
     if not username or not email or not password:
         return jsonify({'message': 'All fields are required.'}), 400
 
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    hashed_password = hasher.hash(password)
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        # Check if user already exists
-        cursor.execute("SELECT * FROM Users WHERE username = %s OR email = %s", (username, email))
-        existing_user = cursor.fetchone()
-        
-        if existing_user:
-            return jsonify({'message': 'Username or email already exists.'}), 400
-        
-        # Insert new user
-        cursor.execute(
-            "INSERT INTO Users (username, email, password) VALUES (%s, %s, %s)",
-            (username, email, hashed_password)
-        )
-        conn.commit()
-        
-        cursor.close()
-        conn.close()
+        with connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+
+            # Check if user already exists
+            cursor.execute("SELECT * FROM Users WHERE username = %s OR email = %s", (username, email))
+            existing_user = cursor.fetchone()
+
+            if existing_user:
+                cursor.close()
+                return jsonify({'message': 'Username or email already exists.'}), 400
+
+            # Insert new user
+            cursor.execute(
+                "INSERT INTO Users (username, email, password) VALUES (%s, %s, %s)",
+                (username, email, hashed_password)
+            )
+            conn.commit()
+
+            cursor.close()
 
         token = create_access_token({"sub": username})
         response = make_response(jsonify({"message": "User registered successfully"}))
@@ -284,16 +407,15 @@ def login():
 
 
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        with connection() as conn:
+            cursor = conn.cursor(dictionary=True)
 
-        cursor.execute("SELECT * FROM Users WHERE username = %s", (username,))
-        user = cursor.fetchone()
+            cursor.execute("SELECT * FROM Users WHERE username = %s", (username,))
+            user = cursor.fetchone()
 
-        cursor.close()
-        conn.close()
+            cursor.close()
 
-        if user and bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
+        if user and hasher.check(password, user['password']):
             token = create_access_token({"sub": username})
             response = make_response(jsonify({"message": "Login successful"}))
             response.set_cookie(
@@ -310,6 +432,8 @@ def login():
         else:
             return jsonify({"message": "Invalid username or password"}), 401
 
+    except (HasherOverloaded, HasherTimeout):
+        raise
     except Exception as e:
         logger.error(f"Error in /login endpoint: {e}")
         return jsonify({"error": "Internal server error"}), 500
@@ -0,0 +1,105 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import bcrypt
+from db import summary_ms
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+# hashes allowed in flight (running + queued) before new ones are refused
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(HASH_WORKERS * 4)))
+HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", "10"))
+
+
+class HasherOverloaded(Exception):
+    """Raised when the hash queue is full; the caller should answer 429."""
+
+
+class HasherTimeout(Exception):
+    """Raised when a hash doesn't finish within HASH_TIMEOUT; answer 503."""
+
+
+class HashMetrics:
+    """Counters plus rolling queue-wait and hash durations."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._waits = deque(maxlen=window)
+        self._hashes = deque(maxlen=window)
+
+    def record(self, waited, hashed):
+        with self._lock:
+            self.completed += 1
+            self._waits.append(waited)
+            self._hashes.append(hashed)
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "queue_ms": summary_ms(self._waits),
+                "hash_ms": summary_ms(self._hashes),
+            }
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated thread pool.
+
+    bcrypt releases the GIL while hashing, so request threads only block on
+    a future and the read endpoints keep being served during a login burst.
+    At most `max_pending` hashes are accepted at once; beyond that callers
+    get HasherOverloaded immediately instead of queueing without bound.
+    """
+
+    def __init__(self, workers=HASH_WORKERS, max_pending=HASH_MAX_PENDING,
+                 rounds=BCRYPT_ROUNDS, timeout=HASH_TIMEOUT):
+        self.rounds = rounds
+        self.timeout = timeout
+        self.metrics = HashMetrics()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.metrics.record_rejected()
+            raise HasherOverloaded("Too many password hashes in flight")
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            result = fn(*args)
+            self.metrics.record(started - submitted, time.perf_counter() - started)
+            return result
+
+        future = self._executor.submit(task)
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self.metrics.record_timeout()
+            raise HasherTimeout(f"Password hash took longer than {self.timeout}s")
+
+    def hash(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check(self, password, hashed):
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+hasher = PasswordHasher()
@@ -41,14 +41,24 @@ export default function PoliticianDetail() {
 
   useEffect(() => {
     if (!name) return
-    fetch("http://localhost:5000/Trades")
-      .then((res) => {
+    // page through this politician's trades using the API's next_cursor
+    const loadAll = async () => {
+      const rows: any[] = []
+      let cursor: string | null = null
+      do {
+        const params = new URLSearchParams({ politician: name, limit: "500" })
+        if (cursor) params.set("cursor", cursor)
+        const res = await fetch(`http://localhost:5000/Trades?${params}`)
         if (!res.ok) throw new Error("Couldn’t load trades")
-        return res.json()
-      })
+        const page = await res.json()
+        rows.push(...page.trades)
+        cursor = page.next_cursor
+      } while (cursor)
+      return rows
+    }
+    loadAll()
       .then((json: any[]) => {
-        const all = (json as any[])
-          .filter((t) => t.politician === name)
+        const all = json
           .map((t) => ({
             id:                   t.id,
             politician:          t.politician,
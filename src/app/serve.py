@@ -0,0 +1,72 @@
+"""Production server for the Flask API.
+
+Worker model: API_WORKERS processes, each running API_THREADS request
+threads. Handlers stay synchronous; every worker process gets its own DB
+connection pool (created lazily after fork) sized to its thread count unless
+DB_POOL_SIZE says otherwise, so a request thread never waits on another
+process's connections. Each worker also keeps its own response cache;
+invalidations are shared through stamp files in API_CACHE_STAMP_DIR.
+
+On POSIX this runs gunicorn with threaded workers. On Windows, where gunicorn
+is unavailable, it falls back to waitress with API_WORKERS * API_THREADS
+threads in a single process.
+
+    python serve.py
+"""
+import os
+import sys
+import tempfile
+import logging
+
+HOST = os.getenv("API_HOST", "127.0.0.1")
+PORT = int(os.getenv("API_PORT", "5000"))
+WORKERS = int(os.getenv("API_WORKERS", str(os.cpu_count() or 2)))
+THREADS = int(os.getenv("API_THREADS", "4"))
+
+# must be in place before main/db/cache read their settings
+os.environ.setdefault("DB_POOL_SIZE", str(THREADS))
+if WORKERS > 1 and not os.getenv("API_CACHE_STAMP_DIR"):
+    os.environ["API_CACHE_STAMP_DIR"] = tempfile.mkdtemp(prefix="politrade-cache-")
+
+from main import app
+
+logger = logging.getLogger(__name__)
+
+
+def serve_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    Server(app, {
+        "bind": f"{HOST}:{PORT}",
+        "workers": WORKERS,
+        "threads": THREADS,
+        "worker_class": "gthread",
+        "timeout": 60,
+        "accesslog": "-",
+    }).run()
+
+
+def serve_waitress():
+    from waitress import serve
+    serve(app, host=HOST, port=PORT, threads=WORKERS * THREADS)
+
+
+if __name__ == "__main__":
+    logger.info(f"Serving API on {HOST}:{PORT} with {WORKERS} workers x {THREADS} threads")
+    if sys.platform == "win32":
+        serve_waitress()
+    else:
+        serve_gunicorn()
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import requests
+
+# The scraper and the API are flat scripts; put their directories on the path
+# the same way they reach each other (see NN/train.py).
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for sub in (("Trade Scraper",), ("src", "app")):
+    path = os.path.join(ROOT, *sub)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class FakeResponse:
+    def __init__(self, text, status=200):
+        self.text = text
+        self.status_code = status
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+class FakeSession:
+    """Serves fixture pages by URL; anything unlisted is a 404."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def get(self, url, timeout=None):
+        self.requested.append(url)
+        if url not in self.pages:
+            return FakeResponse("", 404)
+        return FakeResponse(read_fixture(self.pages[url]))
+
+    def close(self):
+        pass
@@ -0,0 +1,42 @@
+"""A fake Alpaca bars client for the fetcher tests and Trade Scraper/bench_bars.py."""
+import time
+import random
+import threading
+import numpy as np
+import pandas as pd
+
+
+class StubBarsClient:
+    """Stands in for StockHistoricalDataClient.get_stock_bars."""
+
+    def __init__(self, latency=0.2, per_symbol=0.004, failure_rate=0.05, days=250, seed=0):
+        self.latency = latency
+        self.per_symbol = per_symbol
+        self.failure_rate = failure_rate
+        self.days = days
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def get_stock_bars(self, req):
+        symbols = req.symbol_or_symbols
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.failure_rate
+        time.sleep(self.latency + self.per_symbol * len(symbols))
+        if fail:
+            with self._lock:
+                self.failures += 1
+            raise ConnectionError("stub: simulated 429/timeout")
+
+        stamps = pd.date_range("2024-01-01", periods=self.days, freq="D", tz="UTC")
+        index = pd.MultiIndex.from_product([symbols, stamps], names=["symbol", "timestamp"])
+        n = len(index)
+        close = 100 + np.random.default_rng(len(symbols)).standard_normal(n).cumsum()
+        df = pd.DataFrame({
+            "open": close, "high": close + 1, "low": close - 1, "close": close,
+            "volume": np.full(n, 1000, dtype="int64"),
+            "trade_count": np.full(n, 10.0), "vwap": close,
+        }, index=index)
+        return type("BarSet", (), {"df": df})()
@@ -0,0 +1,52 @@
+import time
+
+import jwt
+import pytest
+
+import auth
+from auth import TokenCache
+
+
+@pytest.fixture
+def secret(monkeypatch):
+    monkeypatch.setattr(auth, "SECRET_KEY", "test-secret-at-least-32-bytes-long")
+    monkeypatch.setattr(auth, "token_cache", TokenCache())
+    return "test-secret-at-least-32-bytes-long"
+
+
+def test_valid_token_is_cached(secret, monkeypatch):
+    token = auth.create_access_token({"sub": "alice"})
+    assert auth.decode_access_token(token)["sub"] == "alice"
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("served from the cache")
+    monkeypatch.setattr(auth.jwt, "decode", no_decode)
+    assert auth.decode_access_token(token)["sub"] == "alice"
+
+
+def test_invalid_token_is_not_cached(secret):
+    forged = jwt.encode({"sub": "alice", "exp": time.time() + 60}, "another-secret-at-least-32-bytes", algorithm="HS256")
+    assert auth.decode_access_token(forged) is None
+    assert auth.token_cache.get(forged) is None
+
+
+def test_entry_expires_with_the_token(monkeypatch):
+    cache = TokenCache()
+    now = time.time()
+    cache.put("t", {"sub": "alice", "exp": now + 10})
+    assert cache.get("t") == {"sub": "alice", "exp": now + 10}
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("t") is None
+
+
+def test_ttl_and_size_bound(monkeypatch):
+    cache = TokenCache(max_entries=2, ttl=5)
+    exp = time.time() + 3600
+    for t in ("a", "b", "c"):
+        cache.put(t, {"exp": exp})
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+
+    start = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: start + 6)
+    assert cache.get("c") is None
@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+
+import datascraper
+from datascraper import TokenBucket, bars_to_frame, fetch_bar_batch, fetch_bar_batches
+from stub_bars import StubBarsClient
+
+START = datascraper.HISTORY_START
+
+
+class FakeClock:
+    """Stands in for time.monotonic/time.sleep; sleeping advances the clock.
+
+    Zero-length sleeps (the stub client's latency) aren't recorded.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+        self._lock = threading.Lock()
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if not seconds:
+            return
+        with self._lock:
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(datascraper.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(datascraper.time, "sleep", clock.sleep)
+    monkeypatch.setattr(datascraper, "BAR_RETRY_BASE_DELAY", 0.01)
+    return clock
+
+
+class FlakyClient(StubBarsClient):
+    """Fails the first `failures` calls, and every call for `broken` symbols."""
+
+    def __init__(self, failures=0, broken=()):
+        super().__init__(latency=0, per_symbol=0, failure_rate=0, days=3)
+        self.remaining = failures
+        self.broken = set(broken)
+
+    def get_stock_bars(self, req):
+        with self._lock:
+            fail = self.remaining > 0 or bool(self.broken & set(req.symbol_or_symbols))
+            self.remaining -= 1
+            if fail:
+                self.calls += 1
+                self.failures += 1
+        if fail:
+            raise ConnectionError("stub: simulated 429")
+        return super().get_stock_bars(req)
+
+
+def test_token_bucket_bursts_then_paces(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+    for _ in range(5):
+        bucket.acquire()
+    # two tokens are there up front; each of the other three waits half a second
+    assert clock.sleeps == [0.5, 0.5, 0.5]
+
+
+def test_token_bucket_refills_while_idle(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 10
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == []
+
+
+def test_token_bucket_zero_rate_is_unlimited(clock):
+    bucket = TokenBucket(rate=0)
+    for _ in range(100):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+
+def test_fetch_bar_batch_retries_with_backoff(clock):
+    client = FlakyClient(failures=3)
+    df = fetch_bar_batch(client, TokenBucket(0), START, ["AAPL", "MSFT"], None, retries=4)
+    assert client.calls == 4
+    assert set(bars_to_frame(df)["symbol"]) == {"AAPL", "MSFT"}
+    # jittered exponential backoff: attempt n waits within [0.5, 1] * base * 2^n
+    assert len(clock.sleeps) == 3
+    for attempt, delay in enumerate(clock.sleeps):
+        assert 0.005 * 2 ** attempt <= delay <= 0.01 * 2 ** attempt
+
+
+def test_fetch_bar_batch_gives_up_after_retries(clock):
+    client = FlakyClient(failures=10)
+    with pytest.raises(ConnectionError):
+        fetch_bar_batch(client, TokenBucket(0), START, ["AAPL"], None, retries=2)
+    assert client.calls == 3
+    assert len(clock.sleeps) == 2
+
+
+def test_failed_batch_does_not_stop_the_others(clock):
+    client = FlakyClient(broken={"BAD"})
+    batches = [(START, [f"S{i}", f"T{i}"]) for i in range(6)] + [(START, ["BAD", "X"])]
+    results = {tuple(chunk): (frame, err)
+               for chunk, frame, err in fetch_bar_batches(client, batches, None, workers=2,
+                                                          bucket=TokenBucket(0), retries=1)}
+    assert len(results) == len(batches)
+    frame, err = results[("BAD", "X")]
+    assert frame is None and isinstance(err, ConnectionError)
+    for start, chunk in batches[:-1]:
+        frame, err = results[tuple(chunk)]
+        assert err is None
+        assert set(bars_to_frame(frame)["symbol"]) == set(chunk)
+
+
+def test_at_most_two_batches_per_worker_in_flight(clock):
+    workers, pulled = 3, []
+
+    def batches():
+        for i in range(20):
+            pulled.append(i)
+            yield START, [f"S{i}"]
+
+    in_flight = []
+    client = FlakyClient()
+    for done, _ in enumerate(fetch_bar_batches(client, batches(), None, workers=workers,
+                                               bucket=TokenBucket(0))):
+        # batches handed to the pool, minus those already consumed
+        in_flight.append(len(pulled) - done)
+    assert len(in_flight) == 20
+    assert max(in_flight) == 2 * workers
@@ -0,0 +1,53 @@
+from flask import Flask
+
+import cache
+from cache import ResponseCache, cached
+
+
+def test_put_skipped_after_invalidate():
+    c = ResponseCache()
+    generation = c.generation("trades")
+    c.invalidate({"trades"})
+    c.put("/Trades?", "trades", b"old", "application/json", generation)
+    assert c.get("/Trades?") is None
+
+    generation = c.generation("trades")
+    c.invalidate({"politicians"})
+    c.put("/Trades?", "trades", b"new", "application/json", generation)
+    assert c.get("/Trades?").body == b"new"
+
+
+def test_invalidate_all_bumps_every_scope():
+    c = ResponseCache()
+    generation = c.generation("stats")
+    c.invalidate()
+    c.put("/PoliticianStats?", "stats", b"old", "application/json", generation)
+    assert c.get("/PoliticianStats?") is None
+
+
+def test_stamp_from_another_worker_during_build(tmp_path):
+    worker, other = ResponseCache(stamp_dir=str(tmp_path)), ResponseCache(stamp_dir=str(tmp_path))
+    generation = worker.generation("trades")
+    other.invalidate({"trades"})
+    worker.put("/Trades?", "trades", b"old", "application/json", generation)
+    assert worker.get("/Trades?") is None
+
+
+def test_cached_view_racing_an_invalidate(monkeypatch):
+    monkeypatch.setattr(cache, "response_cache", ResponseCache())
+    app = Flask(__name__)
+    calls = []
+
+    @app.route("/Trades")
+    @cached("trades")
+    def trades():
+        calls.append(1)
+        if len(calls) == 1:
+            # a scrape commits and invalidates while this response is built
+            cache.response_cache.invalidate({"trades"})
+        return {"calls": len(calls)}
+
+    client = app.test_client()
+    assert client.get("/Trades").json == {"calls": 1}
+    assert client.get("/Trades").json == {"calls": 2}
+    assert client.get("/Trades").json == {"calls": 2}
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+import loadtest
+from loadtest import migration_files, split_sql
+
+
+def test_migrations_run_in_numeric_order():
+    names = [os.path.basename(p) for p in migration_files()]
+    assert names[0] == "iteration4.sql"
+    numbers = [int(n[len("iteration"):-len(".sql")]) for n in names]
+    assert numbers == sorted(numbers)
+    assert "iteration3.5.sql" not in names
+
+
+def test_split_sql_keeps_trigger_bodies_whole():
+    statements = split_sql("""
+-- comment
+DROP TRIGGER IF EXISTS t;
+
+DELIMITER $$
+CREATE TRIGGER t AFTER INSERT ON x
+FOR EACH ROW
+BEGIN
+  CALL a(NEW.id);
+  CALL b(NEW.id);
+END$$
+DELIMITER ;
+
+INSERT INTO x VALUES (1);
+""")
+    assert len(statements) == 3
+    assert statements[1].startswith("CREATE TRIGGER t")
+    assert statements[1].endswith("END")
+    assert "CALL b(NEW.id);" in statements[1]
+
+
+def test_every_migration_splits():
+    for path in migration_files():
+        with open(path, encoding="utf-8") as f:
+            assert split_sql(f.read())
+
+
+def test_seed_refuses_the_configured_database(monkeypatch):
+    def no_connection(**kw):
+        raise AssertionError("connected before refusing")
+    monkeypatch.setattr(loadtest, "get_db_connection", no_connection)
+    with pytest.raises(SystemExit):
+        loadtest.seed(loadtest.db_config["database"], 1, 1)
+    with pytest.raises(SystemExit):
+        loadtest.seed("trades; DROP TABLE users", 1, 1)
@@ -0,0 +1,80 @@
+from datetime import date
+
+import pytest
+
+from conftest import FakeSession, read_fixture
+from datascraper import (
+    parse_header, parse_politician_html, parse_trade_rows, scrape_politician_page_http,
+)
+
+URL = "https://www.capitoltrades.com/politicians/P000197"
+
+
+def test_header_fields():
+    fields, _ = parse_politician_html(read_fixture("politician_page.html"), URL)
+    assert parse_header(fields) == {
+        "name": "Nancy Pelosi",
+        "party": "Democrat",
+        "chamber": "House",
+        "state": "California",
+        "image": "https://www.capitoltrades.com/_next/image?url=%2Fpoliticians%2FP000197.jpg&w=256&q=75",
+    }
+
+
+def test_rows_feed_parse_trade_rows():
+    fields, rows = parse_politician_html(read_fixture("politician_page.html"), URL)
+    # header row plus three trades
+    assert len(rows) == 4
+    assert rows[0] == ([], None)
+
+    trades, reached = parse_trade_rows(rows, parse_header(fields), page=1)
+    assert not reached
+    # the bond row has no valid ticker
+    assert [t["ticker"] for t in trades] == ["NVDA", "AAPL"]
+
+    nvda, aapl = trades
+    assert nvda["politician"] == "Nancy Pelosi"
+    assert nvda["traded_issuer"] == "NVIDIA Corp\nNVDA:US"
+    assert nvda["published_date"] == "3 Jan 2025"
+    assert nvda["trade_dt"] == date(2024, 12, 20)
+    assert nvda["published_dt"] == date(2025, 1, 3)
+    assert nvda["trade_type"] == "buy"
+    assert (nvda["min_purchase_price"], nvda["max_purchase_price"]) == (1_000_000, 5_000_000)
+    assert nvda["page"] == 1
+
+    assert aapl["trade_dt"] == date(2024, 9, 1)
+    assert aapl["published_dt"] == date(2024, 9, 10)
+    assert (aapl["min_purchase_price"], aapl["max_purchase_price"]) == (0, 1000)
+
+
+def test_page_without_table():
+    fields, rows = parse_politician_html(read_fixture("politician_no_trades.html"), URL)
+    assert rows is None
+    assert fields["name"] == "Nancy Pelosi"
+
+
+def test_missing_header_field_means_unknown():
+    fields, rows = parse_politician_html(read_fixture("politician_client_rendered.html"), URL)
+    assert len(rows) == 1
+    header = parse_header(fields)
+    assert header["name"] == header["party"] == header["chamber"] == header["state"] == "Unknown"
+
+
+def test_http_scrape_stops_past_last_page():
+    session = FakeSession({
+        URL: "politician_page.html",
+        f"{URL}?page=2": "politician_no_trades.html",
+    })
+    trades, complete = scrape_politician_page_http(URL, session, max_pages=5)
+    assert complete
+    assert [t["ticker"] for t in trades] == ["NVDA", "AAPL"]
+    assert session.requested == [URL, f"{URL}?page=2"]
+
+
+@pytest.mark.parametrize("pages", [
+    {URL: "politician_client_rendered.html"},
+    {URL: "politician_no_trades.html"},
+    {},
+])
+def test_http_scrape_falls_back_to_browser(pages):
+    assert scrape_politician_page_http(URL, FakeSession(pages)) is None
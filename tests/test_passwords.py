@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from db import summary_ms
+from passwords import HasherOverloaded, HasherTimeout, PasswordHasher
+
+
+def test_hash_and_check():
+    hasher = PasswordHasher(workers=2, max_pending=4, rounds=4)
+    hashed = hasher.hash("hunter2")
+    assert hasher.check("hunter2", hashed)
+    assert not hasher.check("hunter3", hashed)
+    snap = hasher.metrics.snapshot()
+    assert snap["completed"] == 3
+    assert set(snap["hash_ms"]) == {"p50", "p99", "max"}
+
+
+def test_full_queue_is_refused():
+    hasher = PasswordHasher(workers=1, max_pending=1, rounds=4, timeout=5)
+    running, release = threading.Event(), threading.Event()
+
+    def block():
+        running.set()
+        release.wait()
+
+    worker = threading.Thread(target=hasher._run, args=(block,))
+    worker.start()
+    try:
+        assert running.wait(5)
+        with pytest.raises(HasherOverloaded):
+            hasher.hash("hunter2")
+    finally:
+        release.set()
+        worker.join()
+    assert hasher.metrics.snapshot()["rejected"] == 1
+
+
+def test_slow_hash_times_out():
+    hasher = PasswordHasher(workers=1, max_pending=2, rounds=4, timeout=0.05)
+    release = threading.Event()
+    try:
+        with pytest.raises(HasherTimeout):
+            hasher._run(release.wait)
+    finally:
+        release.set()
+    assert hasher.metrics.snapshot()["timeouts"] == 1
+
+
+def test_summary_ms():
+    assert summary_ms([]) == {"p50": 0.0, "p99": 0.0, "max": 0.0}
+    assert summary_ms([0.001, 0.002, 0.010]) == {"p50": 2.0, "p99": 10.0, "max": 10.0}
+    assert summary_ms([0.001, 0.002, 0.010], (0.5, 0.9)) == {"p50": 2.0, "p90": 10.0, "max": 10.0}
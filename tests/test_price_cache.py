@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import datascraper
+from datascraper import PriceIndex
+from price_cache import EPOCH, PRICE_COLUMNS, PriceCache
+
+
+def secs(*days):
+    return np.array([(datetime(2024, 1, d) - EPOCH).total_seconds() for d in days])
+
+
+def test_write_load_and_merge(tmp_path):
+    cache = PriceCache(str(tmp_path))
+    assert cache.load("AAPL") is None
+    assert not cache.merge("AAPL", secs(1), {c: np.array([1.0]) for c in PRICE_COLUMNS})
+
+    cache.write("aapl ", secs(1, 2), {c: np.array([1.0, 2.0]) for c in PRICE_COLUMNS})
+    ts, close = cache.load("AAPL")
+    assert list(ts) == list(secs(1, 2))
+    assert list(close) == [1.0, 2.0]
+
+    # day 2 is restated and day 3 is new; the newer bars win
+    assert cache.merge("AAPL", secs(2, 3), {c: np.array([20.0, 3.0]) for c in PRICE_COLUMNS})
+    ts, close = cache.load("AAPL", "close")
+    assert list(ts) == list(secs(1, 2, 3))
+    assert list(close) == [1.0, 20.0, 3.0]
+
+
+class FakeHistory:
+    """historical_trades rows (symbol, timestamp, open, high, low, close) behind
+    a connection that answers PriceIndex's two queries."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def cursor(self):
+        return self
+
+    def close(self):
+        pass
+
+    def execute(self, sql, params):
+        self.queries.append(sql)
+        rows = sorted((r for r in self.rows if r[0] in params), key=lambda r: (r[0], r[1]))
+        if "MAX(timestamp)" in sql:
+            by_symbol = {}
+            for r in rows:
+                by_symbol.setdefault(r[0], []).append(r[1])
+            self.result = [(s, max(ts), len(ts)) for s, ts in by_symbol.items()]
+        else:
+            self.result = rows
+
+    def __iter__(self):
+        return iter(self.result)
+
+    def bar_queries(self):
+        return sum("MAX(timestamp)" not in q for q in self.queries)
+
+
+@pytest.fixture
+def history(monkeypatch):
+    start = datetime(2024, 1, 1, 5)
+    db = FakeHistory([
+        ("AAPL", start + timedelta(days=i), 1.0, 1.0, 1.0, 100.0 + i) for i in range(5)
+    ])
+    monkeypatch.setattr(datascraper, "get_db_connection", lambda **kw: db)
+    return db
+
+
+def test_index_uses_cache_until_history_changes(tmp_path, history):
+    cache = PriceCache(str(tmp_path))
+    day = datetime(2024, 1, 3, 5)
+
+    cold = PriceIndex(cache=cache)
+    cold.preload(["AAPL"])
+    assert history.bar_queries() == 1
+    assert cold.nearest("AAPL", day) == (102.0, day)
+
+    warm = PriceIndex(cache=cache)
+    warm.preload(["aapl"])
+    assert history.bar_queries() == 1
+    assert isinstance(warm._series["AAPL"][1], np.memmap)
+    assert warm.nearest("AAPL", day) == (102.0, day)
+
+    # a bar written behind the cache's back makes the cached copy stale
+    history.rows.append(("AAPL", datetime(2024, 1, 10, 5), 1.0, 1.0, 1.0, 200.0))
+    fresh = PriceIndex(cache=cache)
+    fresh.preload(["AAPL"])
+    assert history.bar_queries() == 2
+    assert fresh.nearest("AAPL", datetime(2024, 1, 11))[0] == 200.0
+    # and the reload rewrote the cache
+    assert len(cache.load("AAPL")[0]) == 6
@@ -0,0 +1,160 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+import datascraper
+
+
+class BrokenConnection:
+    closed = False
+
+    def cursor(self, **kw):
+        return self
+
+    def execute(self, *args):
+        raise RuntimeError("roi_dirty_tickers doesn't exist")
+
+    def close(self):
+        type(self).closed = True
+
+
+def test_connection_closed_when_select_fails(monkeypatch):
+    monkeypatch.setattr(datascraper, "get_db_connection", lambda **kw: BrokenConnection())
+    assert datascraper.update_roi_dirty() == 0
+    assert BrokenConnection.closed
+
+
+class FakeIndex:
+    """PriceIndex stand-in: prices rise by 10 from each lookup to the next."""
+
+    def __init__(self, *args, **kw):
+        pass
+
+    def nearest_many(self, symbols, when):
+        return np.array([100.0 + 10 * i for i in range(len(symbols))])
+
+
+class DirtyDB:
+    """roi_dirty_tickers and politician_trades behind a connection that only
+    applies writes on commit. `during_read` runs after the trades are read,
+    i.e. while ROI is being computed."""
+
+    def __init__(self, dirty, trades, during_read=None, fail_update=False):
+        self.dirty = dict(dirty)
+        self.trades = trades
+        self.during_read = during_read
+        self.fail_update = fail_update
+        self.log = []
+        self.staged = []
+
+    def cursor(self, **kw):
+        return DirtyCursor(self)
+
+    def commit(self):
+        self.log.append(("COMMIT", None))
+        for ticker, marked_at in self.staged:
+            if ticker in self.dirty and self.dirty[ticker] <= marked_at:
+                del self.dirty[ticker]
+        self.staged = []
+
+    def rollback(self):
+        self.log.append(("ROLLBACK", None))
+        self.staged = []
+
+    def close(self):
+        pass
+
+
+class DirtyCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, params=()):
+        db = self.db
+        db.log.append((sql, params))
+        if sql.startswith("SELECT ticker, marked_at FROM roi_dirty_tickers"):
+            self.result = [{"ticker": t, "marked_at": m} for t, m in db.dirty.items()]
+        elif "FROM politician_trades WHERE ticker IN" in sql:
+            self.result = [t for t in db.trades if t["ticker"] in params]
+            if db.during_read:
+                db.during_read(db)
+        elif sql.startswith("UPDATE") and db.fail_update:
+            raise RuntimeError("lock wait timeout")
+
+    def executemany(self, sql, rows):
+        self.db.log.append((sql, list(rows)))
+        if sql.startswith("DELETE FROM roi_dirty_tickers"):
+            self.db.staged += rows
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+MARKED = datetime(2026, 1, 1, 12)
+TRADES = [
+    {"id": 1, "ticker": "AAPL", "trade_type": "buy", "trade_dt": date(2024, 1, 2),
+     "published_dt": date(2024, 1, 5), "min_purchase_price": None, "max_purchase_price": None},
+    {"id": 2, "ticker": "AAPL", "trade_type": "sell", "trade_dt": date(2024, 2, 2),
+     "published_dt": date(2024, 2, 5), "min_purchase_price": None, "max_purchase_price": None},
+    {"id": 3, "ticker": "MSFT", "trade_type": "buy", "trade_dt": date(2024, 3, 1),
+     "published_dt": date(2024, 3, 4), "min_purchase_price": None, "max_purchase_price": None},
+]
+
+
+@pytest.fixture
+def connect(monkeypatch):
+    monkeypatch.setattr(datascraper, "PriceIndex", FakeIndex)
+
+    def use(db):
+        monkeypatch.setattr(datascraper, "get_db_connection", lambda **kw: db)
+        return db
+    return use
+
+
+def test_cleanup_keeps_tickers_marked_again(connect):
+    def remark(db):
+        db.dirty["AAPL"] = MARKED + timedelta(seconds=1)
+
+    db = connect(DirtyDB({"AAPL": MARKED, "MSFT": MARKED}, TRADES, during_read=remark))
+    assert datascraper.update_roi_dirty() == 2
+    deletes = [rows for sql, rows in db.log if sql.startswith("DELETE FROM roi_dirty_tickers")]
+    assert deletes == [[("AAPL", MARKED), ("MSFT", MARKED)]]
+    # AAPL was marked again after it was read, so it is still waiting
+    assert db.dirty == {"AAPL": MARKED + timedelta(seconds=1)}
+
+
+def test_rois_and_cleanup_commit_together(connect):
+    db = connect(DirtyDB({"AAPL": MARKED, "MSFT": MARKED}, TRADES))
+    datascraper.update_roi_dirty()
+    writes = [sql for sql, _ in db.log if sql.startswith(("UPDATE", "DELETE", "COMMIT"))]
+    assert writes[0].startswith("UPDATE politician_trades")
+    assert writes[1].startswith("DELETE FROM roi_dirty_tickers")
+    assert writes[2:] == ["COMMIT"]
+    assert db.dirty == {}
+
+
+def test_failed_write_keeps_tickers_dirty(connect):
+    db = connect(DirtyDB({"AAPL": MARKED}, TRADES, fail_update=True))
+    assert datascraper.update_roi_dirty() == 0
+    statements = [sql for sql, _ in db.log]
+    assert "COMMIT" not in statements and "ROLLBACK" in statements
+    assert db.dirty == {"AAPL": MARKED}
+
+
+def test_per_trade_mode_writes_trade_rois(connect, monkeypatch):
+    db = connect(DirtyDB({"AAPL": MARKED, "MSFT": MARKED}, TRADES))
+    calls = []
+    for name in ("write_trade_rois", "write_pair_rois"):
+        original = getattr(datascraper, name)
+        monkeypatch.setattr(datascraper, name,
+                            lambda cnx, rows, cleanup=None, name=name, original=original:
+                            calls.append((name, rows)) or original(cnx, rows, cleanup))
+    assert datascraper.update_roi_dirty(by_pairs=False) == 2
+    assert [name for name, _ in calls] == ["write_trade_rois"]
+    assert sorted(r[0] for r in calls[0][1]) == [1, 2, 3]
+    assert db.dirty == {}
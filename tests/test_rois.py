@@ -0,0 +1,221 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import datascraper
+from datascraper import (
+    DATE_FORMAT, PriceIndex, _as_date, calculate_roi_range, compute_pair_rois,
+    compute_trade_rois, safe_parse_date,
+)
+from price_cache import EPOCH
+
+BASE = datetime(2022, 1, 3, 5)
+SYMBOLS = ["AAPL", "MSFT", "BRK.B"]
+
+
+@pytest.fixture
+def index(monkeypatch):
+    """A PriceIndex over random in-memory bars, with zero and missing prices
+    and repeated timestamps mixed in; ZZZ has no bars at all."""
+    monkeypatch.setattr(datascraper, "get_price_cache", lambda: None)
+    rng = random.Random(7)
+    idx = PriceIndex()
+    for sym in SYMBOLS:
+        secs, prices, t = [], [], BASE
+        for _ in range(300):
+            t += timedelta(days=rng.choice([1, 1, 3]), hours=rng.choice([0, 0, 12]))
+            repeats = 2 if rng.random() < 0.05 else 1
+            for _ in range(repeats):
+                r = rng.random()
+                secs.append((t - EPOCH).total_seconds())
+                prices.append(0.0 if r < 0.03 else np.nan if r < 0.05 else rng.uniform(1, 500))
+        idx._series[sym] = (np.array(secs), np.array(prices))
+    for sym in ("ZZZ", ""):
+        idx._series[sym] = (np.array([]), np.array([]))
+    return idx
+
+
+@pytest.fixture
+def steady(index):
+    """AAPL with one bar a day through 2022, priced 100 + days since Jan 1."""
+    days = np.arange(365)
+    index._series["AAPL"] = (
+        np.array([(datetime(2022, 1, 1) - EPOCH).total_seconds() + d * 86400 for d in days]),
+        100.0 + days,
+    )
+    return index
+
+
+def random_date(rng):
+    r = rng.random()
+    if r < 0.05:
+        return None
+    if r < 0.08:
+        return "bogus"
+    text = (BASE + timedelta(days=rng.randint(-30, 1000))).strftime(DATE_FORMAT)
+    return text.replace("Sep ", "Sept ") if rng.random() < 0.5 else text
+
+
+def random_trades(n, seed):
+    rng = random.Random(seed)
+    sizes = [None, Decimal("0.00"), Decimal("1001.00"), Decimal("15000.00"), Decimal("50000")]
+    return [
+        {
+            "id": i,
+            "ticker": rng.choice(SYMBOLS + ["ZZZ", "aapl ", None]),
+            "trade_type": rng.choice(["buy", "sell", "Buy ", " SELL", "exchange", None, 1.0]),
+            "trade_date": random_date(rng),
+            "published_date": random_date(rng),
+            "min_purchase_price": rng.choice(sizes),
+            "max_purchase_price": rng.choice(sizes),
+        }
+        for i in range(n)
+    ]
+
+
+def typed(trades):
+    """The same trades as read from the typed trade_dt/published_dt columns."""
+    df = trades.drop(columns=["trade_date", "published_date"])
+    df["trade_dt"] = [_as_date(safe_parse_date(d)) for d in trades["trade_date"]]
+    df["published_dt"] = [_as_date(safe_parse_date(d)) for d in trades["published_date"]]
+    return df
+
+
+def test_trade_rois_match_calculate_roi_range(index):
+    records = random_trades(2000, seed=1)
+    expected = [
+        (r["id"], *calculate_roi_range(
+            r["min_purchase_price"], r["max_purchase_price"], r["ticker"],
+            r["trade_date"], r["published_date"], index=index
+        ))
+        for r in records
+    ]
+    trades = pd.DataFrame(records)
+    assert compute_trade_rois(trades, index) == expected
+    assert compute_trade_rois(typed(trades), index) == expected
+
+
+def test_trade_rois_cases(index):
+    secs, prices = index._series["AAPL"]
+    priced = int(np.flatnonzero(prices > 0)[0])
+    day = (EPOCH + timedelta(seconds=float(secs[priced]))).strftime(DATE_FORMAT)
+    records = [
+        # unranged: plain price move, here from and to the same bar
+        {"min_purchase_price": None, "max_purchase_price": None, "published_date": day},
+        # ranged, with a NULL trade date
+        {"min_purchase_price": Decimal("1001.00"), "max_purchase_price": Decimal("15000.00"),
+         "published_date": day},
+        # a zero bound has no ROI, so neither does the average
+        {"min_purchase_price": Decimal("0.00"), "max_purchase_price": Decimal("1000.00"),
+         "published_date": day},
+        # NULL dates fall back to the current price on both ends
+        {"min_purchase_price": None, "max_purchase_price": None, "published_date": None},
+    ]
+    for i, r in enumerate(records):
+        r.update(id=i, ticker="AAPL", trade_date=day if i == 0 else None)
+    rows = compute_trade_rois(pd.DataFrame(records), index)
+
+    sp = float(prices[priced])
+    assert rows[0] == (0, 0.0, 0.0, 0.0)
+    worst, best = round((sp - 15000) / 150, 2), round((sp - 1001) / 10.01, 2)
+    assert rows[1][:3] == (1, worst, best)
+    assert rows[2] == (2, round((sp - 1000) / 10, 2), None, None)
+    assert rows[3] == (3, 0.0, 0.0, 0.0)
+    for r, row in zip(records, rows):
+        assert calculate_roi_range(
+            r["min_purchase_price"], r["max_purchase_price"], r["ticker"],
+            r["trade_date"], r["published_date"], index=index
+        ) == row[1:]
+
+
+def old_pair_rois(records, index):
+    """The per-ticker loop compute_pair_rois replaced. `WHERE ticker=%s`
+    matched case-insensitively and STR_TO_DATE sorted NULL dates first."""
+    out = {}
+    tickers = {r["ticker"].strip() for r in records if isinstance(r["ticker"], str)}
+    keys = {t.upper() for t in tickers if datascraper.is_valid_ticker(t)}
+    for key in sorted(keys):
+        rows = [r for r in records
+                if isinstance(r["ticker"], str) and r["ticker"].strip().upper() == key]
+        rows.sort(key=lambda r: (safe_parse_date(r["trade_date"]) is not None,
+                                 safe_parse_date(r["trade_date"]) or datetime.min, r["id"]))
+        clean = [r for r in rows if isinstance(r["trade_type"], str)]
+        pairs, i = [], 0
+        while i < len(clean) - 1:
+            if (clean[i]["trade_type"].strip().lower() == "buy" and
+                    clean[i+1]["trade_type"].strip().lower() == "sell"):
+                pairs.append((clean[i], clean[i+1]))
+                i += 2
+            else:
+                i += 1
+        rois = []
+        for buy, sell in pairs:
+            b, _ = datascraper.get_historical_price(key, buy["trade_date"], index=index)
+            s, _ = datascraper.get_historical_price(key, sell["published_date"], index=index)
+            if b and s:
+                rois.append(((s - b) / b) * 100)
+        if rois:
+            out[key] = (round(sum(rois) / len(rois), 2), round(min(rois), 2), round(max(rois), 2))
+    return out
+
+
+def pair_rois(records, index):
+    rows = compute_pair_rois(pd.DataFrame(records), index)
+    return {t.upper(): tuple(roi) for t, *roi in rows}
+
+
+def test_pair_rois_match_old_loop(index):
+    # the pair jobs only ever select non-NULL tickers
+    records = [r for r in random_trades(3000, seed=2) if r["ticker"] is not None]
+    expected = old_pair_rois(records, index)
+    assert expected
+    assert pair_rois(records, index) == expected
+    assert pair_rois(typed(pd.DataFrame(records)), index) == expected
+
+
+@pytest.mark.parametrize("trades, pairs", [
+    # buy, buy, sell: only the second buy pairs with the sell
+    ([("buy", "03 Jan 2022", "05 Jan 2022"), ("buy", "10 Jan 2022", "12 Jan 2022"),
+      ("sell", "20 Jan 2022", "01 Feb 2022")], [(109, 131)]),
+    # sell, buy, sell: the leading sell is ignored
+    ([("sell", "03 Jan 2022", "05 Jan 2022"), ("buy", "10 Jan 2022", "12 Jan 2022"),
+      ("sell", "20 Jan 2022", "01 Feb 2022")], [(109, 131)]),
+    # a non-string trade_type is dropped, so the buy meets the sell after it
+    ([("buy", "03 Jan 2022", "05 Jan 2022"), (None, "10 Jan 2022", "12 Jan 2022"),
+      ("sell", "20 Jan 2022", "01 Feb 2022")], [(102, 131)]),
+    # the sell with a NULL trade date sorts first, so nothing pairs
+    ([("buy", "03 Jan 2022", "05 Jan 2022"), ("buy", "10 Jan 2022", "12 Jan 2022"),
+      ("sell", None, "01 Feb 2022")], []),
+    # two buy/sell pairs back to back, in mixed case
+    ([("buy", "03 Jan 2022", "05 Jan 2022"), ("sell", "10 Jan 2022", "15 Jan 2022"),
+      ("Buy ", "20 Jan 2022", "22 Jan 2022"), (" SELL", "25 Jan 2022", "01 Feb 2022")],
+     [(102, 114), (119, 131)]),
+])
+def test_pair_rois_sequences(steady, trades, pairs):
+    records = [
+        {"id": i, "ticker": "AAPL", "trade_type": tt, "trade_date": d, "published_date": p}
+        for i, (tt, d, p) in enumerate(trades)
+    ]
+    rois = [(s - b) / b * 100 for b, s in pairs]
+    expected = [
+        ("AAPL", round(sum(rois) / len(rois), 2), round(min(rois), 2), round(max(rois), 2))
+    ] if rois else []
+    assert compute_pair_rois(pd.DataFrame(records), steady) == expected
+    assert pair_rois(records, steady) == old_pair_rois(records, steady)
+
+
+def test_pair_rois_group_tickers_case_insensitively(steady):
+    records = [
+        {"id": 1, "ticker": "aapl", "trade_type": "buy", "trade_date": "03 Jan 2022",
+         "published_date": "05 Jan 2022"},
+        {"id": 2, "ticker": "AAPL ", "trade_type": "sell", "trade_date": "10 Jan 2022",
+         "published_date": "15 Feb 2022"},
+    ]
+    rows = compute_pair_rois(pd.DataFrame(records), steady)
+    # bought at 102 on Jan 3, sold at 145 on Feb 15
+    assert rows == [("aapl", 42.16, 42.16, 42.16)]
+    assert pair_rois(records, steady) == old_pair_rois(records, steady)
@@ -0,0 +1,38 @@
+import hashlib
+from datetime import date
+
+from datascraper import trade_hash
+
+
+def trade(**overrides):
+    t = {
+        "politician": "Nancy Pelosi", "ticker": "NVDA", "traded_issuer": "NVIDIA Corp",
+        "trade_date": "20 Dec 2024", "trade_dt": date(2024, 12, 20),
+        "published_date": "3 Jan 2025", "published_dt": date(2025, 1, 3),
+        "trade_type": "buy", "min_purchase_price": 1_000_000.0, "max_purchase_price": 5_000_000.0,
+    }
+    t.update(overrides)
+    return t
+
+
+def test_matches_mysql_generated_column():
+    # UNHEX(MD5(CONCAT_WS(0x1f, ...))) as in SQLIterations/iteration11.sql
+    raw = "\x1f".join([
+        "Nancy Pelosi", "NVDA", "2024-12-20", "2025-01-03", "buy", "1000000.00", "5000000.00",
+    ])
+    assert trade_hash(trade()) == hashlib.md5(raw.encode("utf-8")).digest()
+
+
+def test_date_spelling_does_not_change_key():
+    assert trade_hash(trade(trade_date="10 Sept 2024", trade_dt=date(2024, 9, 10))) == \
+        trade_hash(trade(trade_date="10 Sep 2024", trade_dt=date(2024, 9, 10)))
+
+
+def test_issuer_text_is_not_part_of_key():
+    assert trade_hash(trade(traded_issuer="NVIDIA Corporation")) == trade_hash(trade())
+
+
+def test_unparsed_date_and_missing_price():
+    raw = "\x1f".join(["Nancy Pelosi", "NVDA", "sometime", "2025-01-03", "buy", "0.00", ""])
+    t = trade(trade_date="sometime", trade_dt=None, min_purchase_price=0, max_purchase_price=None)
+    assert trade_hash(t) == hashlib.md5(raw.encode("utf-8")).digest()
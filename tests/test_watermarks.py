@@ -0,0 +1,110 @@
+from datetime import date
+
+import pytest
+
+from conftest import FakeSession, read_fixture
+import datascraper
+from datascraper import (
+    ScrapeWatermarks, parse_header, parse_politician_html, parse_trade_rows, trade_hash,
+)
+
+URL = "https://www.capitoltrades.com/politicians/P000197"
+
+
+@pytest.fixture
+def page():
+    fields, rows = parse_politician_html(read_fixture("politician_page.html"), URL)
+    return parse_header(fields), rows
+
+
+def test_stops_at_stored_trade(page):
+    header, rows = page
+    everything, _ = parse_trade_rows(rows, header, 1)
+    newest, second = everything
+
+    trades, reached = parse_trade_rows(rows, header, 1, {"trade_hash": trade_hash(newest)})
+    assert (trades, reached) == ([], True)
+    trades, reached = parse_trade_rows(rows, header, 1, {"trade_hash": trade_hash(second)})
+    assert reached and trades == [newest]
+
+
+def test_stops_before_stored_published_date(page):
+    header, rows = page
+    # NVDA was published 3 Jan 2025, AAPL 10 Sep 2024
+    trades, reached = parse_trade_rows(rows, header, 1, {"published_dt": date(2024, 9, 10)})
+    assert not reached
+    assert [t["ticker"] for t in trades] == ["NVDA", "AAPL"]
+
+    trades, reached = parse_trade_rows(rows, header, 1, {"published_dt": date(2024, 12, 1)})
+    assert reached
+    assert [t["ticker"] for t in trades] == ["NVDA"]
+
+
+def test_removed_watermark_trade_still_stops_by_date(page):
+    header, rows = page
+    watermark = {"trade_hash": b"\0" * 16, "published_dt": date(2024, 12, 1)}
+    trades, reached = parse_trade_rows(rows, header, 1, watermark)
+    assert reached
+    assert [t["ticker"] for t in trades] == ["NVDA"]
+
+
+def scrape(monkeypatch, pages, watermarks):
+    monkeypatch.setattr(datascraper, "new_http_session", lambda *a: FakeSession(pages))
+    return list(datascraper.scrape_politicians([URL], workers=1, backend="http",
+                                               watermarks=watermarks))
+
+
+def test_complete_scrape_records_watermark(monkeypatch):
+    watermarks = ScrapeWatermarks()
+    scraped = scrape(monkeypatch, {
+        URL: "politician_page.html",
+        f"{URL}?page=2": "politician_no_trades.html",
+    }, watermarks)
+    assert [t["ticker"] for t in scraped[0]] == ["NVDA", "AAPL"]
+    assert watermarks.heads[URL]["ticker"] == "NVDA"
+
+
+def test_failed_page_keeps_watermark(monkeypatch):
+    watermarks = ScrapeWatermarks()
+    # page 2 is a 404
+    scraped = scrape(monkeypatch, {URL: "politician_page.html"}, watermarks)
+    assert len(scraped[0]) == 2
+    assert watermarks.heads == {}
+
+
+class FakeWatermarkDB:
+    def __init__(self):
+        self.rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def cursor(self):
+        return self
+
+    def executemany(self, sql, rows):
+        self.rows = rows
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_save_skips_politicians_with_unstored_trades(monkeypatch):
+    db = FakeWatermarkDB()
+    monkeypatch.setattr(datascraper, "get_db_connection", lambda **kw: db)
+    ok = {"politician": "A", "ticker": "X", "trade_date": "1 Jan 2025", "trade_dt": date(2025, 1, 1),
+          "published_date": "2 Jan 2025", "published_dt": date(2025, 1, 2), "trade_type": "buy",
+          "min_purchase_price": 1000.0, "max_purchase_price": 15000.0}
+    watermarks = ScrapeWatermarks()
+    watermarks.record("a", [ok])
+    watermarks.record("b", [{**ok, "politician": "B"}])
+    watermarks.save(failed={"B"})
+
+    assert db.rows == [("a", "A", trade_hash(ok), date(2025, 1, 2))]
+    assert set(watermarks.by_url) == {"a"}